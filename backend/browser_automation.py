@@ -1,165 +1,628 @@
+import argparse
 import asyncio
 import os
 import datetime
+import json
+import hashlib
+import time
+import contextlib
+import io
+from PIL import Image
 from playwright.async_api import async_playwright
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, write_to_textfile
 import asyncpg
 
 # Database connection details
 DATABASE_URL = os.environ.get("DATABASE_URL", "")
 
-async def scrape_gmail_and_calendar():
+# Pages to scrape; override to point the scraper at local fixtures
+GMAIL_URL = os.environ.get("PULSEBOARD_GMAIL_URL", "https://mail.google.com/")
+CALENDAR_URL = os.environ.get("PULSEBOARD_CALENDAR_URL", "https://calendar.google.com/")
+
+# Where screenshots are written, as <source>/<content hash>.<format>
+SCREENSHOT_DIR = os.environ.get("PULSEBOARD_SCREENSHOT_DIR", "/home/ubuntu/projects/services/pulseboard/screenshots")
+
+# Screenshot encoding: "webp" or "jpeg", and the encoder quality (1-100)
+SCREENSHOT_FORMAT = os.environ.get("PULSEBOARD_SCREENSHOT_FORMAT", "webp").lower()
+SCREENSHOT_QUALITY = int(os.environ.get("PULSEBOARD_SCREENSHOT_QUALITY", "80"))
+
+# A capture whose perceptual hash is within this many bits of the previous capture
+# of the same source is treated as unchanged and not stored; 0 skips only exact matches
+SCREENSHOT_MAX_DISTANCE = int(os.environ.get("PULSEBOARD_SCREENSHOT_MAX_DISTANCE", "2"))
+
+# Side of the difference-hash grid; 16 gives a 256-bit hash, fine enough that a
+# new inbox row on a full-page capture still changes it
+PHASH_SIZE = 16
+
+# Browser profile reused across runs so the Google session survives restarts
+PROFILE_DIR = os.environ.get("PULSEBOARD_BROWSER_PROFILE", os.path.expanduser("~/.pulseboard/browser-profile"))
+
+# Headless by request; headful (on DISPLAY :1) is still the default for interactive logins
+HEADLESS = os.environ.get("PULSEBOARD_SCRAPER_HEADLESS", "").lower() in ("1", "true", "yes")
+
+# Seconds between scrape cycles in daemon mode
+SCRAPE_INTERVAL = int(os.environ.get("PULSEBOARD_SCRAPE_INTERVAL", "300"))
+
+# How long to wait for the inbox rows / calendar grid to render
+PAGE_READY_TIMEOUT_MS = 30000
+
+# Requests that never affect the scraped data and are aborted before they hit the network
+BLOCKED_RESOURCE_TYPES = {"image", "font", "media"}
+BLOCKED_URL_FRAGMENTS = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "/gen_204",
+    "/log?",
+    "play.google.com/log",
+)
+BLOCK_RESOURCES = os.environ.get("PULSEBOARD_SCRAPER_BLOCK_RESOURCES", "1").lower() in ("1", "true", "yes")
+
+# Prometheus textfile written after every cycle, e.g. into node_exporter's
+# --collector.textfile.directory as pulseboard_scraper.prom; unset disables it
+METRICS_FILE = os.environ.get("PULSEBOARD_SCRAPER_METRICS_FILE", "")
+
+METRICS = CollectorRegistry()
+PHASE_SECONDS = Histogram(
+    "pulseboard_scraper_phase_duration_seconds",
+    "Time spent in each scrape phase (launch, navigation, extraction, screenshot, db_write).",
+    ["source", "phase"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+    registry=METRICS,
+)
+CYCLE_SECONDS = Histogram(
+    "pulseboard_scraper_cycle_duration_seconds", "Duration of whole scrape cycles.",
+    buckets=(1, 2.5, 5, 10, 30, 60, 120, 300), registry=METRICS,
+)
+CYCLE_FAILURES = Counter("pulseboard_scraper_cycle_failures", "Cycles that needed a browser relaunch.", registry=METRICS)
+ROWS_SCRAPED = Counter("pulseboard_scraper_rows_scraped", "Rows extracted, by source.", ["source"], registry=METRICS)
+LAST_CYCLE = Gauge("pulseboard_scraper_last_cycle_timestamp_seconds", "Unix time the last cycle finished.", registry=METRICS)
+
+
+@contextlib.contextmanager
+def phase(source, name):
+    """Times one scrape phase into PHASE_SECONDS."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        PHASE_SECONDS.labels(source, name).observe(time.perf_counter() - start)
+
+
+def write_metrics():
+    """Atomically rewrites METRICS_FILE for the node_exporter textfile collector."""
+    if not METRICS_FILE:
+        return
+    try:
+        write_to_textfile(METRICS_FILE, METRICS)
+    except OSError as e:
+        print(f"Could not write scraper metrics to {METRICS_FILE}: {e}")
+
+
+async def init_connection(conn):
+    """Registers a binary JSONB codec so dicts can be passed for JSONB columns."""
+    await conn.set_type_codec(
+        "jsonb",
+        encoder=lambda value: b"\x01" + json.dumps(value).encode("utf-8"),
+        decoder=lambda value: json.loads(value[1:].decode("utf-8")),
+        schema="pg_catalog",
+        format="binary",
+    )
+
+
+def perceptual_hash(image) -> int:
+    """Difference hash: one bit per horizontally adjacent pair of a downscaled grayscale image."""
+    small = image.convert("L").resize((PHASH_SIZE + 1, PHASH_SIZE), Image.LANCZOS)
+    pixels = list(small.getdata())
+    bits = 0
+    for row in range(PHASH_SIZE):
+        for col in range(PHASH_SIZE):
+            left = pixels[row * (PHASH_SIZE + 1) + col]
+            bits = (bits << 1) | (left > pixels[row * (PHASH_SIZE + 1) + col + 1])
+    return bits
+
+
+def encode_screenshot(png, previous_hash):
     """
-    Uses Playwright to scrape Gmail and Google Calendar.
-    Saves screenshots and stores data in PostgreSQL.
+    Hashes and re-encodes a PNG capture; runs in a worker thread.
+
+    Returns None when the capture is within SCREENSHOT_MAX_DISTANCE of
+    `previous_hash`, otherwise (encoded bytes, perceptual hash, width, height).
     """
-    # Set the DISPLAY environment variable for headful operation
-    os.environ["DISPLAY"] = ":1"
+    image = Image.open(io.BytesIO(png))
+    image.load()
+    phash = perceptual_hash(image)
+    if previous_hash is not None and bin(phash ^ previous_hash).count("1") <= SCREENSHOT_MAX_DISTANCE:
+        return None
+    output = io.BytesIO()
+    if SCREENSHOT_FORMAT == "jpeg":
+        image.convert("RGB").save(output, "JPEG", quality=SCREENSHOT_QUALITY, optimize=True)
+    else:
+        image.save(output, "WEBP", quality=SCREENSHOT_QUALITY, method=4)
+    return output.getvalue(), phash, image.width, image.height
 
-    # Ensure screenshots directory exists
-    os.makedirs("/home/ubuntu/projects/services/pulseboard/screenshots", exist_ok=True)
 
-    async with async_playwright() as p:
-        # Launch a headful Chromium browser
-        browser = await p.chromium.launch(headless=False, args=["--disable-web-security"])
-        page = await browser.new_page()
+def write_file_once(path, data):
+    """Writes `data` to `path` atomically unless a file with that (content-addressed) name exists."""
+    if os.path.exists(path):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
 
-        # --- SCRAPE GMAIL ---
-        try:
-            print("Navigating to Gmail...")
-            await page.goto("https://mail.google.com/")
-
-            # Wait for login page or inbox to load
-            await page.wait_for_load_state("networkidle")
-            # Add logic here to handle potential login if not already logged in
-            # This is a simplified version assuming the user is already logged in or will log in manually during headful execution
-
-            # Take a screenshot of the inbox
-            gmail_screenshot_path = "/home/ubuntu/projects/services/pulseboard/screenshots/gmail-inbox.png"
-            await page.screenshot(path=gmail_screenshot_path, full_page=True)
-            print(f"Gmail screenshot saved to {gmail_screenshot_path}")
-
-            # Scrape email subjects and senders
-            # This is a simplified example; actual selectors may vary based on Gmail's UI
-            # Look for elements representing emails in the inbox view
-            # Example: .zE class for starred emails, .afn for subject, .yW for sender name
-            # These selectors are fragile and may break with UI updates.
-            # A more robust solution would involve the Gmail API.
-            # For this demo, we'll use common selectors for the inbox list items.
-            email_elements = await page.query_selector_all("tr.zA") # Common selector for email rows in inbox
-            emails_scraped = []
-            for element in email_elements[:10]: # Limit to first 10 emails for demo
-                try:
-                    sender_element = await element.query_selector(".yP, .zF") # Try common sender selectors
-                    subject_element = await element.query_selector(".y6, .aHS-b-n") # Try common subject selectors
-                    sender = await sender_element.inner_text() if sender_element else "Unknown Sender"
-                    subject = await subject_element.inner_text() if subject_element else "No Subject"
-                    # Determine read/unread status - often indicated by font weight or other styles
-                    is_read = await element.get_attribute("class") is not None and "zE" not in (await element.get_attribute("class")).split() # Simplified logic
-                    emails_scraped.append({
-                        "sender": sender.strip(),
-                        "subject": subject.strip(),
-                        "is_read": is_read
-                    })
-                except Exception as e:
-                    print(f"Error scraping individual email item: {e}")
-                    continue
 
-            print(f"Scraped {len(emails_scraped)} emails from Gmail.")
+# Perceptual hash of the last stored capture per source, seeded from the database
+last_screenshot_hashes = {}
+
+
+async def load_screenshot_hashes(pool):
+    async with pool.acquire() as conn:
+        rows = await conn.fetch("""
+            SELECT DISTINCT ON (source) source, perceptual_hash FROM pulseboard_screenshots
+            ORDER BY source, timestamp DESC, id DESC
+        """)
+    for row in rows:
+        last_screenshot_hashes.setdefault(row["source"], int(row["perceptual_hash"], 16))
 
-        except Exception as e:
-            print(f"Error scraping Gmail: {e}")
-            # Take a screenshot even if an error occurs
-            gmail_error_screenshot_path = "/home/ubuntu/projects/services/pulseboard/screenshots/gmail-error.png"
-            await page.screenshot(path=gmail_error_screenshot_path, full_page=True)
-            print(f"Gmail error screenshot saved to {gmail_error_screenshot_path}")
 
+async def capture_screenshot(page, source, pool=None):
+    """
+    Captures the page into the content-addressed screenshot store.
 
-        # --- SCRAPE GOOGLE CALENDAR ---
+    Decoding, hashing and encoding happen off the event loop. Captures that
+    look the same as the previous one for `source` are dropped; stored ones
+    get a row in pulseboard_screenshots. Returns the file path, or None when
+    the capture was skipped.
+    """
+    with phase(source, "screenshot"):
+        png = await page.screenshot(full_page=True)
+        encoded = await asyncio.to_thread(encode_screenshot, png, last_screenshot_hashes.get(source))
+        if encoded is None:
+            print(f"Screenshot for {source} unchanged, not stored.")
+            return None
+        data, phash, width, height = encoded
+        digest = hashlib.sha256(data).hexdigest()
+        extension = "jpg" if SCREENSHOT_FORMAT == "jpeg" else "webp"
+        path = os.path.join(SCREENSHOT_DIR, source.replace(":", "-"), f"{digest}.{extension}")
+        await asyncio.to_thread(write_file_once, path, data)
+    last_screenshot_hashes[source] = phash
+    if pool:
         try:
-            print("Navigating to Google Calendar...")
-            # Navigate to Google Calendar in a new tab
-            calendar_page = await browser.new_page()
-            await calendar_page.goto("https://calendar.google.com/")
-            await calendar_page.wait_for_load_state("networkidle")
-
-            # Take a screenshot of the calendar view
-            calendar_screenshot_path = "/home/ubuntu/projects/services/pulseboard/screenshots/calendar-today.png"
-            await calendar_page.screenshot(path=calendar_screenshot_path, full_page=True)
-            print(f"Calendar screenshot saved to {calendar_screenshot_path}")
-
-            # Scrape today's events
-            # This is also fragile and depends on the UI structure.
-            # Look for events on the current day/month view.
-            # Example: .mv, .Om, .J-K-U-Jo-ax, .J-K-U-Jo-Jw
-            # A more robust solution would use the Google Calendar API.
-            today_date = datetime.date.today().strftime("%Y-%m-%d")
-            # Find elements representing events for the current day
-            # This selector `.g3dbUd` is commonly associated with event containers in month view.
-            # It might not capture all events depending on view type (day, week, month).
-            event_elements = await calendar_page.query_selector_all(".g3dbUd") # Common selector for event items
-            events_scraped = []
-            for element in event_elements:
-                try:
-                    # Attempt to extract event title/time
-                    # Title is often within a child element with specific classes
-                    title_element = await element.query_selector("div, span") # Generic search within event container
-                    title = await title_element.inner_text() if title_element else "Untitled Event"
-                    # Time extraction is tricky without knowing the exact DOM structure reliably
-                    # For simplicity, we'll just get the title and assume it's for today
-                    events_scraped.append({
-                        "name": title.strip(),
-                        "date": today_date # Assuming scraped events are for today
-                    })
-                except Exception as e:
-                    print(f"Error scraping individual calendar event: {e}")
-                    continue
+            async with pool.acquire() as conn:
+                await conn.execute(
+                    """
+                    INSERT INTO pulseboard_screenshots
+                        (source, content_hash, perceptual_hash, format, width, height, size_bytes, path)
+                    VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
+                    """,
+                    source, digest, f"{phash:0{PHASH_SIZE * PHASH_SIZE // 4}x}", extension, width, height, len(data), path,
+                )
+        except Exception as e:
+            print(f"Error recording screenshot metadata: {e}")
+    print(f"Screenshot for {source} saved to {path} ({len(data)} bytes, PNG was {len(png)}).")
+    return path
+
+
+async def block_heavy_requests(route):
+    """Aborts images, fonts, media and analytics beacons; lets everything else through."""
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(
+        fragment in request.url for fragment in BLOCKED_URL_FRAGMENTS
+    ):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def launch_context(playwright):
+    """Launches Chromium with the persistent profile and request blocking installed."""
+    if not HEADLESS:
+        # Set the DISPLAY environment variable for headful operation
+        os.environ.setdefault("DISPLAY", ":1")
+    context = await playwright.chromium.launch_persistent_context(
+        PROFILE_DIR,
+        headless=HEADLESS,
+        args=["--disable-web-security"],
+    )
+    if BLOCK_RESOURCES:
+        await context.route("**/*", block_heavy_requests)
+    return context
+
+
+# JavaScript run once per view inside the page: every row is read in a single
+# round trip instead of several query_selector/inner_text calls per element.
+# These selectors are fragile and may break with UI updates; the Gmail and
+# Calendar APIs would be more robust.
+GMAIL_EXTRACT_JS = """
+(rows) => rows.map((row) => {
+    const text = (el) => (el ? el.textContent.trim() : null);
+    const senderEl = row.querySelector('.yP, .zF');
+    const subjectEl = row.querySelector('.y6, .aHS-b-n, .bog');
+    const snippetEl = row.querySelector('.y2');
+    const timeEl = row.querySelector('.xW span[title], .xW span');
+    const threadEl = row.querySelector('[data-thread-id], [data-legacy-thread-id]');
+    return {
+        sender: (senderEl && (senderEl.getAttribute('name') || text(senderEl))) || 'Unknown Sender',
+        sender_email: senderEl ? senderEl.getAttribute('email') : null,
+        subject: text(subjectEl) || 'No Subject',
+        snippet: snippetEl ? text(snippetEl).replace(/^[-\u2013\s]+/, '') : null,
+        is_read: !row.classList.contains('zE'),
+        received: timeEl ? (timeEl.getAttribute('title') || text(timeEl)) : null,
+        thread_id: threadEl ? (threadEl.getAttribute('data-thread-id') || threadEl.getAttribute('data-legacy-thread-id')) : null,
+    };
+})
+"""
+
+CALENDAR_EXTRACT_JS = """
+(chips) => chips.map((chip) => {
+    const titleEl = chip.querySelector('div, span');
+    const text = chip.textContent.replace(/\s+/g, ' ').trim();
+    const range = text.match(/(\d{1,2}(?::\d{2})?\s*(?:am|pm)?)\s*(?:[\u2013-]|to)\s*(\d{1,2}(?::\d{2})?\s*(?:am|pm)?)/i);
+    return {
+        name: (titleEl ? titleEl.textContent.trim() : '') || 'Untitled Event',
+        starts: range ? range[1].trim() : null,
+        ends: range ? range[2].trim() : null,
+        event_id: chip.getAttribute('data-eventid'),
+        text: text,
+    };
+})
+"""
+
+# Upper bounds on rows collected per run, across pages
+MAX_EMAILS = int(os.environ.get("PULSEBOARD_MAX_EMAILS", "500"))
+MAX_EVENTS = int(os.environ.get("PULSEBOARD_MAX_EVENTS", "500"))
+
+# Gmail's "Older" button; disabled on the last page
+GMAIL_NEXT_PAGE_SELECTOR = "[aria-label='Older']:not([aria-disabled='true'])"
+
+# Sources tracked in pulseboard_scrape_state
+GMAIL_SOURCE = "browser_automation_gmail"
+CALENDAR_SOURCE = "browser_automation_calendar"
+
+# Newest inbox keys remembered per run; the next run stops once it reaches any of them
+WATERMARK_KEYS = 20
+
+# Ignore the watermark and walk the whole inbox up to PULSEBOARD_MAX_EMAILS
+FULL_RESCAN = os.environ.get("PULSEBOARD_FULL_RESCAN", "").lower() in ("1", "true", "yes")
+
+# The daemon ignores the watermark every this many cycles (0 to never), so read state
+# changes on older emails reach the database; incremental runs only see the first page
+FULL_RESCAN_EVERY = int(os.environ.get("PULSEBOARD_FULL_RESCAN_EVERY", "12"))
+
+
+def content_hash(*parts):
+    """Stable SHA-256 natural key over the identifying fields of a scraped item."""
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def email_key(email):
+    """Identifies an inbox row across pages, scrolls and runs."""
+    return content_hash("email", email["thread_id"], email["sender_email"], email["sender"], email["subject"], email["received"])
+
 
-            print(f"Scraped {len(events_scraped)} events from Google Calendar.")
+def event_key(event, date):
+    """Identifies a calendar event on a given day across runs."""
+    if event["event_id"]:
+        return content_hash("event", event["event_id"], date)
+    return content_hash("event", event["name"], event["text"], date)
 
-            await calendar_page.close()
 
+async def load_more_rows(page, row_selector, next_page_selector=None):
+    """
+    Brings more rows into the DOM, by paging when a next-page control exists
+    and by scrolling the last row into view otherwise.
+
+    Returns False when nothing new appeared, i.e. the end of the list.
+    """
+    first_row = await page.eval_on_selector(row_selector, "(el) => el.outerHTML")
+    row_count = await page.eval_on_selector_all(row_selector, "(els) => els.length")
+    if next_page_selector and await page.query_selector(next_page_selector):
+        await page.click(next_page_selector)
+        # A new page replaces the rows instead of appending to them
+        condition = "([selector, first]) => { const el = document.querySelector(selector); return el && el.outerHTML !== first; }"
+        args = [row_selector, first_row]
+    else:
+        await page.eval_on_selector_all(row_selector, "(els) => els[els.length - 1].scrollIntoView()")
+        condition = "([selector, count]) => document.querySelectorAll(selector).length > count"
+        args = [row_selector, row_count]
+    try:
+        await page.wait_for_function(condition, arg=args, timeout=5000)
+    except Exception:
+        return False
+    return True
+
+
+async def extract_all_rows(page, row_selector, extract_js, key, limit, next_page_selector=None, stop_keys=frozenset()):
+    """
+    Extracts up to `limit` unique records with one evaluate call per page or scroll step.
+
+    Each record gets its key as "content_hash". Rows are read in page order;
+    once a page contains a row whose key is in `stop_keys` no further pages
+    are loaded, which for a newest-first list means everything after it was
+    already stored. The already-stored rows on that page are still returned,
+    so their read state is refreshed.
+    """
+    records = {}
+    reached_seen = False
+    while len(records) < limit:
+        before = len(records)
+        for record in await page.eval_on_selector_all(row_selector, extract_js):
+            record["content_hash"] = key(record)
+            reached_seen = reached_seen or record["content_hash"] in stop_keys
+            records.setdefault(record["content_hash"], record)
+        if reached_seen or len(records) == before or len(records) >= limit:
+            break
+        if not await load_more_rows(page, row_selector, next_page_selector):
+            break
+    return list(records.values())[:limit]
+
+
+async def scrape_gmail(context, stop_keys=frozenset(), pool=None):
+    """Scrapes the inbox rows newer than `stop_keys` from Gmail in its own page."""
+    page = await context.new_page()
+    emails_scraped = []
+    try:
+        print("Navigating to Gmail...")
+        with phase(GMAIL_SOURCE, "navigation"):
+            await page.goto(GMAIL_URL, wait_until="domcontentloaded")
+            # Gmail keeps long-polling connections open, so wait for the inbox rows
+            # instead of networkidle
+            await page.wait_for_selector("tr.zA", timeout=PAGE_READY_TIMEOUT_MS)
+
+        # Take a screenshot of the inbox
+        await capture_screenshot(page, GMAIL_SOURCE, pool)
+
+        with phase(GMAIL_SOURCE, "extraction"):
+            emails_scraped = await extract_all_rows(
+                page, "tr.zA", GMAIL_EXTRACT_JS, email_key, MAX_EMAILS, GMAIL_NEXT_PAGE_SELECTOR, stop_keys
+            )
+        ROWS_SCRAPED.labels(GMAIL_SOURCE).inc(len(emails_scraped))
+        print(f"Scraped {len(emails_scraped)} emails from Gmail.")
+
+    except Exception as e:
+        print(f"Error scraping Gmail: {e}")
+        # Take a screenshot even if an error occurs
+        await capture_screenshot(page, f"{GMAIL_SOURCE}:error", pool)
+    finally:
+        await page.close()
+    return emails_scraped
+
+
+async def scrape_calendar(context, pool=None):
+    """Scrapes today's events from Google Calendar in its own page."""
+    page = await context.new_page()
+    events_scraped = []
+    try:
+        print("Navigating to Google Calendar...")
+        with phase(CALENDAR_SOURCE, "navigation"):
+            await page.goto(CALENDAR_URL, wait_until="domcontentloaded")
+            await page.wait_for_selector("[role='main'], .g3dbUd", timeout=PAGE_READY_TIMEOUT_MS)
+
+        # Take a screenshot of the calendar view
+        await capture_screenshot(page, CALENDAR_SOURCE, pool)
+
+        # `.g3dbUd` is commonly associated with event containers; it might not
+        # capture all events depending on view type (day, week, month).
+        today_date = datetime.date.today().strftime("%Y-%m-%d")
+        # The grid is not ordered by recency, so there is no early stop here;
+        # ON CONFLICT on the content hash keeps repeated runs idempotent
+        with phase(CALENDAR_SOURCE, "extraction"):
+            events_scraped = await extract_all_rows(
+                page, ".g3dbUd", CALENDAR_EXTRACT_JS,
+                lambda event: event_key(event, today_date), MAX_EVENTS,
+            )
+        ROWS_SCRAPED.labels(CALENDAR_SOURCE).inc(len(events_scraped))
+        for event in events_scraped:
+            event["date"] = today_date # Assuming scraped events are for today
+        print(f"Scraped {len(events_scraped)} events from Google Calendar.")
+
+    except Exception as e:
+        print(f"Error scraping Google Calendar: {e}")
+        # Take a screenshot even if an error occurs
+        await capture_screenshot(page, f"{CALENDAR_SOURCE}:error", pool)
+    finally:
+        await page.close()
+    return events_scraped
+
+
+async def load_watermark(pool, source):
+    """Returns the keys remembered for `source` by the previous run."""
+    async with pool.acquire() as conn:
+        keys = await conn.fetchval("SELECT recent_keys FROM pulseboard_scrape_state WHERE source = $1", source)
+    return keys or []
+
+
+async def store_scraped_data(pool, emails_scraped, events_scraped, previous_email_keys=()):
+    """
+    Upserts one cycle's emails and events and advances the per-source watermark.
+
+    Rows are keyed by content_hash: already-stored emails only have their read
+    state and snippet refreshed, already-stored events their title and text,
+    and unchanged rows are left alone. Returns the number of new emails and
+    events.
+    """
+    now = datetime.datetime.now(datetime.timezone.utc)
+    async with pool.acquire() as conn:
+        async with conn.transaction():
+            emails_inserted = await conn.fetch(
+                """
+                INSERT INTO pulseboard_emails (timestamp, sender, subject, body_snippet, is_read, data, content_hash)
+                SELECT $1, * FROM unnest($2::text[], $3::text[], $4::text[], $5::boolean[], $6::jsonb[], $7::text[])
+                ON CONFLICT (content_hash) WHERE content_hash IS NOT NULL DO UPDATE
+                    SET is_read = EXCLUDED.is_read, body_snippet = EXCLUDED.body_snippet
+                    WHERE pulseboard_emails.is_read IS DISTINCT FROM EXCLUDED.is_read
+                       OR pulseboard_emails.body_snippet IS DISTINCT FROM EXCLUDED.body_snippet
+                RETURNING (xmax = 0) AS inserted
+                """,
+                now,
+                [email["sender"] for email in emails_scraped],
+                [email["subject"] for email in emails_scraped],
+                [email["snippet"] for email in emails_scraped],
+                [email["is_read"] for email in emails_scraped],
+                [
+                    {
+                        "source": GMAIL_SOURCE,
+                        "sender_email": email["sender_email"],
+                        "received": email["received"],
+                        "thread_id": email["thread_id"],
+                    }
+                    for email in emails_scraped
+                ],
+                [email["content_hash"] for email in emails_scraped],
+            )
+            events_inserted = await conn.fetch(
+                """
+                INSERT INTO pulseboard_events (timestamp, name, description, source, data, content_hash)
+                SELECT $1, name, description, $2, data, content_hash
+                FROM unnest($3::text[], $4::text[], $5::jsonb[], $6::text[]) AS e(name, description, data, content_hash)
+                ON CONFLICT (content_hash) WHERE content_hash IS NOT NULL DO UPDATE
+                    SET name = EXCLUDED.name, description = EXCLUDED.description, data = EXCLUDED.data
+                    WHERE pulseboard_events.name IS DISTINCT FROM EXCLUDED.name
+                       OR pulseboard_events.description IS DISTINCT FROM EXCLUDED.description
+                RETURNING (xmax = 0) AS inserted
+                """,
+                now,
+                CALENDAR_SOURCE,
+                [event["name"] for event in events_scraped],
+                [event["text"] for event in events_scraped],
+                [
+                    {
+                        "scraped_date": event["date"],
+                        "source": CALENDAR_SOURCE,
+                        "starts": event["starts"],
+                        "ends": event["ends"],
+                        "event_id": event["event_id"],
+                    }
+                    for event in events_scraped
+                ],
+                [event["content_hash"] for event in events_scraped],
+            )
+            new_emails = sum(1 for row in emails_inserted if row["inserted"])
+            new_events = sum(1 for row in events_inserted if row["inserted"])
+
+            # Newest keys first: this run's rows, then what the previous run remembered
+            email_keys = [email["content_hash"] for email in emails_scraped]
+            email_keys += [key for key in previous_email_keys if key not in email_keys]
+            await conn.executemany(
+                """
+                INSERT INTO pulseboard_scrape_state (source, recent_keys, last_run, last_inserted)
+                VALUES ($1, $2, $3, $4)
+                ON CONFLICT (source) DO UPDATE
+                    SET recent_keys = EXCLUDED.recent_keys, last_run = EXCLUDED.last_run, last_inserted = EXCLUDED.last_inserted
+                """,
+                [
+                    (GMAIL_SOURCE, email_keys[:WATERMARK_KEYS], now, new_emails),
+                    (CALENDAR_SOURCE, [], now, new_events),
+                ],
+            )
+    print(f"Stored {new_emails} new emails and {new_events} new events in the database "
+          f"({len(emails_scraped)} and {len(events_scraped)} scraped).")
+    return new_emails, new_events
+
+
+async def run_cycle(context, pool, full=False):
+    """Scrapes Gmail and Calendar concurrently, then stores the results; `full` ignores the inbox watermark."""
+    start = time.perf_counter()
+    previous_email_keys = []
+    if full:
+        print("Full inbox rescan this cycle.")
+    if pool and not (full or FULL_RESCAN):
+        try:
+            previous_email_keys = await load_watermark(pool, GMAIL_SOURCE)
+        except Exception as e:
+            print(f"Error loading scrape watermark, scanning the full inbox: {e}")
+    emails_scraped, events_scraped = await asyncio.gather(
+        scrape_gmail(context, frozenset(previous_email_keys), pool),
+        scrape_calendar(context, pool),
+    )
+    if pool:
+        try:
+            with phase("database", "db_write"):
+                await store_scraped_data(pool, emails_scraped, events_scraped, previous_email_keys)
         except Exception as e:
-            print(f"Error scraping Google Calendar: {e}")
-            # Take a screenshot even if an error occurs
-            calendar_error_screenshot_path = "/home/ubuntu/projects/services/pulseboard/screenshots/calendar-error.png"
-            await page.screenshot(path=calendar_error_screenshot_path, full_page=True)
-            print(f"Calendar error screenshot saved to {calendar_error_screenshot_path}")
+            print(f"Error storing data in database: {e}")
+    elapsed = time.perf_counter() - start
+    CYCLE_SECONDS.observe(elapsed)
+    print(f"Scrape cycle finished in {elapsed:.2f}s.")
+    return emails_scraped, events_scraped
 
-        finally:
-            await browser.close()
 
-    # --- STORE DATA IN POSTGRESQL ---
+async def run_scraper(interval=SCRAPE_INTERVAL, once=False):
+    """
+    Runs scrape cycles every `interval` seconds until cancelled.
+
+    The browser context and the database pool are created once and reused by
+    every cycle; the context is relaunched only if the browser goes away.
+    """
+    os.makedirs(SCREENSHOT_DIR, exist_ok=True)
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+
+    pool = None
+    cycle = 0
     try:
         print("Connecting to database to store scraped data...")
-        pool = await asyncpg.create_pool(DATABASE_URL)
+        pool = await asyncpg.create_pool(DATABASE_URL, min_size=1, max_size=2, init=init_connection)
+    except Exception as e:
+        print(f"Failed to connect to database, scraped data will not be stored: {e}")
+    if pool:
+        try:
+            await load_screenshot_hashes(pool)
+        except Exception as e:
+            print(f"Error loading previous screenshot hashes: {e}")
 
-        async with pool.acquire() as conn:
-            # Insert scraped emails into pulseboard_emails table
-            for email in emails_scraped:
-                await conn.execute(
-                    "INSERT INTO pulseboard_emails (timestamp, sender, subject, is_read, data) VALUES ($1, $2, $3, $4, $5)",
-                    datetime.datetime.now(datetime.timezone.utc),
-                    email["sender"],
-                    email["subject"],
-                    email["is_read"],
-                    {"source": "browser_automation_gmail"}
-                )
+    async with async_playwright() as p:
+        context = None
+        try:
+            while True:
+                cycle_start = time.monotonic()
+                cycle += 1
+                try:
+                    # A failed launch (e.g. the profile still locked by a crashed browser)
+                    # counts as a failed cycle and is retried after the interval
+                    if context is None:
+                        with phase("browser", "launch"):
+                            context = await launch_context(p)
+                    await run_cycle(context, pool, full=bool(FULL_RESCAN_EVERY) and cycle % FULL_RESCAN_EVERY == 0)
+                except Exception as e:
+                    CYCLE_FAILURES.inc()
+                    print(f"Scrape cycle failed, relaunching the browser next cycle: {e}")
+                    if context is not None:
+                        try:
+                            await context.close()
+                        except Exception:
+                            pass # The browser is already gone
+                    context = None
+                LAST_CYCLE.set_to_current_time()
+                write_metrics()
+                if once:
+                    break
+                await asyncio.sleep(max(0, interval - (time.monotonic() - cycle_start)))
+        finally:
+            if context is not None:
+                await context.close()
+            if pool:
+                await pool.close()
 
-            # Insert scraped events into pulseboard_events table
-            for event in events_scraped:
-                await conn.execute(
-                    "INSERT INTO pulseboard_events (timestamp, name, source, data) VALUES ($1, $2, $3, $4)",
-                    datetime.datetime.now(datetime.timezone.utc),
-                    event["name"],
-                    "browser_automation_calendar",
-                    {"scraped_date": event["date"], "source": "browser_automation_calendar"}
-                )
 
-        print(f"Stored {len(emails_scraped)} emails and {len(events_scraped)} events in the database.")
-        await pool.close()
+async def scrape_gmail_and_calendar():
+    """
+    Uses Playwright to scrape Gmail and Google Calendar once.
+    Saves screenshots and stores data in PostgreSQL.
+    """
+    await run_scraper(once=True)
 
-    except Exception as e:
-        print(f"Error storing data in database: {e}")
 
 if __name__ == "__main__":
-    asyncio.run(scrape_gmail_and_calendar())
+    parser = argparse.ArgumentParser(description="Scrape Gmail and Google Calendar into PulseBoard.")
+    parser.add_argument("--once", action="store_true", help="run a single scrape cycle and exit")
+    parser.add_argument("--interval", type=int, default=SCRAPE_INTERVAL, help="seconds between scrape cycles")
+    parser.add_argument("--headless", action="store_true", help="run Chromium without a display")
+    parser.add_argument("--full", action="store_true", help="ignore the inbox watermark and rescan every row")
+    args = parser.parse_args()
+    if args.headless:
+        HEADLESS = True
+    if args.full:
+        FULL_RESCAN = True
+    asyncio.run(run_scraper(interval=args.interval, once=args.once))
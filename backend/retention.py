@@ -0,0 +1,179 @@
+"""
+Partition maintenance and retention for pulseboard_signals.
+
+Meant to run from cron (e.g. daily) next to a server started with
+PULSEBOARD_PARTITION_SIGNALS=1:
+
+    python retention.py                      # create upcoming partitions, expire old ones,
+                                             # compact old hourly stats into days
+    python retention.py --retention-months 6 --dry-run
+    python retention.py --convert            # one-off: partition an existing plain table
+"""
+import argparse
+import asyncio
+import datetime
+import os
+
+import asyncpg
+
+from server import (
+    DATABASE_URL,
+    PARTITION_MONTHS_AHEAD,
+    add_months,
+    ensure_signal_partitions,
+    init_connection,
+    month_bound,
+    signals_partitioned,
+)
+
+# Whole months of raw signals kept; older partitions are dropped. Their counts stay in
+# the stats rollups, whose hourly buckets older than this are compacted into days.
+RETENTION_MONTHS = int(os.environ.get("PULSEBOARD_SIGNAL_RETENTION_MONTHS", "12"))
+
+
+def retention_cutoff(retention_months: int) -> datetime.date:
+    """First month that is kept."""
+    this_month = datetime.datetime.now(datetime.timezone.utc).date().replace(day=1)
+    return add_months(this_month, -retention_months)
+
+
+async def expire_partitions(conn, retention_months: int, dry_run: bool = False):
+    """
+    Drops every monthly partition that ended before the retention cutoff.
+
+    The stats rollups were updated when the rows were inserted and nothing
+    subtracts them on DETACH/DROP or DELETE, so expired signals keep being
+    counted by /api/stats. Dropping a whole partition frees its space at once
+    instead of leaving dead tuples for VACUUM. Old rows that sit in the
+    DEFAULT partition are removed with a DELETE.
+    """
+    cutoff = retention_cutoff(retention_months)
+    partitions = await conn.fetch("""
+        SELECT c.relname
+        FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'pulseboard_signals'::regclass AND c.relname ~ '^pulseboard_signals_p[0-9]{6}$'
+        ORDER BY c.relname
+    """)
+    for row in partitions:
+        name = row["relname"]
+        month = datetime.date(int(name[-6:-2]), int(name[-2:]), 1)
+        if add_months(month, 1) > cutoff:
+            continue
+        if dry_run:
+            print(f"Would drop {name}.")
+            continue
+        async with conn.transaction():
+            await conn.execute("SELECT pg_advisory_xact_lock(hashtext('pulseboard_signals_partitions'))")
+            await conn.execute(f"ALTER TABLE pulseboard_signals DETACH PARTITION {name}")
+            await conn.execute(f"DROP TABLE {name}")
+        print(f"Dropped {name}.")
+
+    if dry_run:
+        return
+    result = await conn.execute("DELETE FROM pulseboard_signals_default WHERE timestamp < $1", month_bound(cutoff))
+    print(f"Expired rows from the default partition: {result}.")
+
+
+async def compact_hourly_stats(conn, retention_months: int, dry_run: bool = False):
+    """
+    Folds hourly stats buckets older than the retention cutoff into one bucket per UTC day.
+
+    Every counter slot of those days is merged into slot 0 at midnight, so
+    day-bucketed series and the totals are unchanged while the hourly table
+    stops growing with hours x slots for old data. Applies to every kind.
+    """
+    cutoff = month_bound(retention_cutoff(retention_months))
+    stale = "bucket < $1 AND (slot <> 0 OR bucket <> date_trunc('day', bucket, 'UTC'))"
+    if dry_run:
+        count = await conn.fetchval(f"SELECT count(*) FROM pulseboard_stats_hourly WHERE {stale}", cutoff)
+        print(f"Would compact {count} hourly stats rows older than {cutoff:%Y-%m-%d} into days.")
+        return
+    async with conn.transaction():
+        result = await conn.execute(
+            f"""
+            WITH old AS (
+                DELETE FROM pulseboard_stats_hourly WHERE {stale}
+                RETURNING kind, dimension, value, bucket, count
+            )
+            INSERT INTO pulseboard_stats_hourly (kind, dimension, value, slot, bucket, count)
+            SELECT kind, dimension, value, 0, date_trunc('day', bucket, 'UTC'), SUM(count) FROM old
+            GROUP BY 1, 2, 3, 5
+            ON CONFLICT (kind, dimension, value, slot, bucket)
+                DO UPDATE SET count = pulseboard_stats_hourly.count + EXCLUDED.count
+            """,
+            cutoff,
+        )
+    print(f"Compacted hourly stats older than {cutoff:%Y-%m-%d} into days: {result}.")
+
+
+async def convert_signals_to_partitioned(conn):
+    """
+    Rebuilds an existing plain pulseboard_signals as a partitioned table.
+
+    Run once with the server stopped. Rows are copied before the insert
+    triggers exist on the new table, so the stats rollups are not counted
+    twice; the server recreates triggers and indexes on its next start.
+    """
+    if await signals_partitioned(conn):
+        print("pulseboard_signals is already partitioned.")
+        return
+    async with conn.transaction():
+        await conn.execute("LOCK TABLE pulseboard_signals IN ACCESS EXCLUSIVE MODE")
+        first = await conn.fetchval("SELECT MIN(timestamp) FROM pulseboard_signals")
+        await conn.execute("""
+            ALTER TABLE pulseboard_signals RENAME TO pulseboard_signals_unpartitioned;
+            DROP INDEX IF EXISTS pulseboard_signals_ts_id_idx;
+            DROP INDEX IF EXISTS pulseboard_signals_type_ts_id_idx;
+            DROP INDEX IF EXISTS pulseboard_signals_source_ts_id_idx;
+            CREATE TABLE pulseboard_signals (
+                id INTEGER NOT NULL DEFAULT nextval('pulseboard_signals_id_seq'),
+                timestamp TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                type VARCHAR(255) NOT NULL,
+                source VARCHAR(255) NOT NULL,
+                data JSONB,
+                PRIMARY KEY (id, timestamp)
+            ) PARTITION BY RANGE (timestamp);
+            CREATE TABLE pulseboard_signals_default PARTITION OF pulseboard_signals DEFAULT;
+        """)
+        first_month = first.astimezone(datetime.timezone.utc).date().replace(day=1) if first else None
+        await ensure_signal_partitions(conn, first_month=first_month)
+        result = await conn.execute("""
+            INSERT INTO pulseboard_signals (id, timestamp, type, source, data)
+            SELECT id, COALESCE(timestamp, now()), type, source, data FROM pulseboard_signals_unpartitioned
+        """)
+        await conn.execute("""
+            ALTER SEQUENCE pulseboard_signals_id_seq OWNED BY pulseboard_signals.id;
+            DROP TABLE pulseboard_signals_unpartitioned;
+        """)
+        # Makes the next server start (or --migrate) run the full migration again
+        if await conn.fetchval("SELECT to_regclass('pulseboard_schema_version') IS NOT NULL"):
+            await conn.execute("DELETE FROM pulseboard_schema_version")
+    print(f"Converted pulseboard_signals to a partitioned table ({result}).")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Partition maintenance and retention for pulseboard_signals.")
+    parser.add_argument("--retention-months", type=int, default=RETENTION_MONTHS)
+    parser.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD)
+    parser.add_argument("--dry-run", action="store_true", help="only list what would be dropped or compacted")
+    parser.add_argument("--convert", action="store_true", help="convert an existing plain table, then exit")
+    args = parser.parse_args()
+
+    conn = await asyncpg.connect(DATABASE_URL)
+    await init_connection(conn)
+    try:
+        if args.convert:
+            await convert_signals_to_partitioned(conn)
+            return
+        if await signals_partitioned(conn):
+            await ensure_signal_partitions(conn, months_ahead=args.months_ahead)
+            await expire_partitions(conn, args.retention_months, dry_run=args.dry_run)
+        else:
+            print("pulseboard_signals is not partitioned; only compacting stats.")
+        await compact_hourly_stats(conn, args.retention_months, dry_run=args.dry_run)
+    finally:
+        await conn.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
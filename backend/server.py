@@ -1,16 +1,170 @@
 import os
-from fastapi import FastAPI, HTTPException, status
-from pydantic import BaseModel
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
 from typing import List, Optional
 import asyncpg
 import datetime
 import asyncio
+import json
+import base64
+import hashlib
+import time
+import re
+import contextlib
+import argparse
+import shutil
+import sys
+
+# prometheus_client writes multiprocess metric files into this directory as soon as a
+# metric is created, so it must exist before the metrics below are defined
+if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, REGISTRY
+from prometheus_client.multiprocess import MultiProcessCollector
+
+try:
+    import orjson
+except ImportError:  # optional: responses fall back to the standard json module
+    orjson = None
+try:
+    import msgpack
+except ImportError:  # optional: msgpack is only served when installed
+    msgpack = None
 
 app = FastAPI()
 
 # Database connection details
 DATABASE_URL = os.environ.get("DATABASE_URL", "")
 
+# Optional read replica for the list, search, export, stats and dashboard endpoints;
+# reads fall back to the primary while it is unreachable
+REPLICA_DATABASE_URL = os.environ.get("PULSEBOARD_REPLICA_DATABASE_URL", "")
+REPLICA_RETRY_SECONDS = 30
+REPLICA_CONNECT_TIMEOUT = 5
+
+# LISTEN needs a session-level connection; set this to a direct Postgres DSN when
+# DATABASE_URL points at PgBouncer in transaction pooling mode
+LISTEN_DATABASE_URL = os.environ.get("PULSEBOARD_LISTEN_DATABASE_URL", "") or DATABASE_URL
+
+# Uvicorn worker processes for `python server.py`, and each worker's pool size.
+# Postgres (or PgBouncer) sees up to WORKERS * POOL_MAX_SIZE connections per pool.
+WORKERS = int(os.environ.get("PULSEBOARD_WORKERS", "1"))
+POOL_MIN_SIZE = int(os.environ.get("PULSEBOARD_POOL_MIN_SIZE", "2"))
+POOL_MAX_SIZE = int(os.environ.get("PULSEBOARD_POOL_MAX_SIZE", "10"))
+
+# asyncpg's prepared statement cache per connection; 0 for PgBouncer in transaction
+# pooling mode, where a connection's prepared statements may belong to another client
+STATEMENT_CACHE_SIZE = int(os.environ.get("PULSEBOARD_STATEMENT_CACHE_SIZE", "100"))
+
+# Run the schema migration (create_tables) in every worker at startup. It is a no-op that
+# takes no table locks once the stored schema version is current. Multi-worker deployments
+# can migrate once with `python server.py --migrate` and turn this off;
+# `python server.py --workers N` does both by itself.
+MIGRATE_ON_STARTUP = os.environ.get("PULSEBOARD_MIGRATE_ON_STARTUP", "1").lower() in ("1", "true", "yes")
+
+# Upper bound on the number of signals accepted by a single batch request
+MAX_BATCH_SIZE = int(os.environ.get("PULSEBOARD_MAX_BATCH_SIZE", "10000"))
+
+# Write-behind mode for POST /api/signals: accept into a bounded queue, answer 202 and
+# let a background flusher group-commit up to WRITE_BEHIND_BATCH_SIZE signals at a time
+WRITE_BEHIND = os.environ.get("PULSEBOARD_WRITE_BEHIND", "").lower() in ("1", "true", "yes")
+WRITE_BEHIND_QUEUE_SIZE = int(os.environ.get("PULSEBOARD_WRITE_BEHIND_QUEUE_SIZE", "10000"))
+WRITE_BEHIND_BATCH_SIZE = int(os.environ.get("PULSEBOARD_WRITE_BEHIND_BATCH_SIZE", "500"))
+WRITE_BEHIND_FLUSH_SECONDS = float(os.environ.get("PULSEBOARD_WRITE_BEHIND_FLUSH_SECONDS", "0.05"))
+
+# A failing flush is retried with exponential backoff up to this delay; new signals are
+# refused with 503 until it succeeds. At shutdown, a batch that still fails after
+# WRITE_BEHIND_SHUTDOWN_RETRIES attempts is appended to WRITE_BEHIND_SPILL_FILE as NDJSON
+# (replay it with POST /api/signals/batch).
+WRITE_BEHIND_MAX_BACKOFF_SECONDS = 30
+WRITE_BEHIND_SHUTDOWN_RETRIES = 3
+WRITE_BEHIND_SPILL_FILE = os.environ.get("PULSEBOARD_WRITE_BEHIND_SPILL_FILE", "write-behind-spill.ndjson")
+
+# Monthly range partitioning of pulseboard_signals by timestamp. Applies when the table is
+# created; an existing plain table is converted with `python retention.py --convert`.
+PARTITION_SIGNALS = os.environ.get("PULSEBOARD_PARTITION_SIGNALS", "").lower() in ("1", "true", "yes")
+PARTITION_MONTHS_AHEAD = int(os.environ.get("PULSEBOARD_PARTITION_MONTHS_AHEAD", "3"))
+
+# Page sizes for the list endpoints
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Rows pulled from the server-side cursor per round trip by the export endpoints
+EXPORT_CHUNK_SIZE = int(os.environ.get("PULSEBOARD_EXPORT_CHUNK_SIZE", "1000"))
+
+# Seconds a rendered /api/dashboard-data snapshot is served before it is rebuilt
+DASHBOARD_CACHE_TTL = float(os.environ.get("PULSEBOARD_DASHBOARD_CACHE_TTL", "5"))
+
+# Columns broken down in the stats rollups for each kind, besides the overall count
+STATS_DIMENSIONS = {
+    "signals": ["type", "source"],
+    "events": ["source"],
+    "emails": ["is_read"],
+}
+
+# Every stats counter is spread over this many rows, picked by backend pid, so concurrent
+# inserts from different connections do not queue on one row lock; readers sum the slots
+STATS_SLOTS = int(os.environ.get("PULSEBOARD_STATS_SLOTS", "8"))
+
+# Live feed: NOTIFY channel, per-subscriber buffer, batching window and SSE keep-alive
+FEED_CHANNEL = "pulseboard_feed"
+FEED_QUEUE_SIZE = int(os.environ.get("PULSEBOARD_FEED_QUEUE_SIZE", "1000"))
+FEED_COALESCE_SECONDS = 0.05
+FEED_KEEPALIVE_SECONDS = 15
+FEED_BACKFILL_LIMIT = 1000
+# Rows replayed per kind to a resuming client before it is sent a "reset" event instead
+FEED_BACKFILL_MAX_ROWS = int(os.environ.get("PULSEBOARD_FEED_BACKFILL_MAX_ROWS", "100000"))
+
+# Feed kinds, in the order their ids appear in an SSE event id, with the table and columns behind each
+FEED_TABLES = {
+    "signals": ("pulseboard_signals", "timestamp, type, source, data"),
+    "events": ("pulseboard_events", "timestamp, name, description, source, data"),
+    "emails": ("pulseboard_emails", "timestamp, sender, subject, body_snippet, is_read, data"),
+}
+
+# Text search configuration baked into the stored search vectors; changing it
+# means dropping the search_vector columns so they are regenerated
+SEARCH_CONFIG = "english"
+
+# Newest matches per kind that are ranked by /api/search; older matches are not considered
+SEARCH_RANK_WINDOW = int(os.environ.get("PULSEBOARD_SEARCH_RANK_WINDOW", "10000"))
+
+# Per searchable kind: table, the weighted tsvector expression stored on each row
+# and the columns returned in results
+SEARCH_TABLES = {
+    "signals": (
+        "pulseboard_signals",
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(type, '') || ' ' || coalesce(source, '')), 'A') || "
+        f"setweight(jsonb_to_tsvector('{SEARCH_CONFIG}', coalesce(data, '{{}}'), '[\"string\"]'), 'B')",
+        "timestamp, type, source, data",
+    ),
+    "events": (
+        "pulseboard_events",
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(name, '')), 'A') || "
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')",
+        "timestamp, name, description, source, data",
+    ),
+    "emails": (
+        "pulseboard_emails",
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(subject, '')), 'A') || "
+        f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(body_snippet, '')), 'B')",
+        "timestamp, sender, subject, body_snippet, is_read, data",
+    ),
+}
+
+# Statements slower than this are printed to the slow-query log
+SLOW_QUERY_SECONDS = float(os.environ.get("PULSEBOARD_SLOW_QUERY_MS", "200")) / 1000
+
+# Statement labels in the query metrics are the whitespace-collapsed SQL, cut to this length
+QUERY_LABEL_LENGTH = 120
+
+# Accept header media types answered with msgpack instead of JSON by the read endpoints
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack", "application/vnd.msgpack")
+
 # Pydantic models for data validation
 class Signal(BaseModel):
     timestamp: datetime.datetime
@@ -33,16 +187,193 @@ class Email(BaseModel):
     is_read: bool
     data: dict
 
-# Database connection pool
+class Screenshot(BaseModel):
+    timestamp: datetime.datetime
+    source: str
+    content_hash: str
+    perceptual_hash: str
+    format: str
+    width: Optional[int]
+    height: Optional[int]
+    size_bytes: int
+    path: str
+
+# Database connection pools; replica_pool stays None without a replica DSN and until
+# the replica has been reached once
 pool = None
+replica_pool = None
+replica_connecting = False
+replica_down_until = 0.0
+
+# Prometheus metrics served on /metrics
+REQUEST_SECONDS = Histogram(
+    "pulseboard_http_request_duration_seconds",
+    "Time from receiving a request to sending the response headers, by route template.",
+    ["method", "route", "status"],
+)
+POOL_ACQUIRE_SECONDS = Histogram(
+    "pulseboard_db_pool_acquire_seconds",
+    "Time spent waiting for a pooled connection.",
+    ["pool"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5),
+)
+REPLICA_FALLBACKS = Counter("pulseboard_db_replica_fallbacks", "Reads sent to the primary because the replica was unreachable.")
+QUERY_SECONDS = Histogram("pulseboard_db_query_duration_seconds", "Statement execution time.", ["statement"])
+QUERY_ERRORS = Counter("pulseboard_db_query_errors_total", "Statements that raised an error.", ["statement"])
+SLOW_QUERIES = Counter("pulseboard_db_slow_queries_total", "Statements slower than PULSEBOARD_SLOW_QUERY_MS.", ["statement"])
+
+def statement_label(query: str) -> str:
+    return " ".join(query.split())[:QUERY_LABEL_LENGTH]
+
+def log_query(record):
+    """asyncpg query logger: per-statement timings, errors and the slow-query log."""
+    label = statement_label(record.query)
+    QUERY_SECONDS.labels(label).observe(record.elapsed)
+    if record.exception is not None:
+        QUERY_ERRORS.labels(label).inc()
+    if record.elapsed >= SLOW_QUERY_SECONDS:
+        SLOW_QUERIES.labels(label).inc()
+        print(f"Slow query ({record.elapsed * 1000:.0f} ms): {' '.join(record.query.split())}")
+
+class PoolCollector:
+    """Size and idle connections of this worker's pools."""
+
+    def collect(self):
+        worker = str(os.getpid())
+        size = GaugeMetricFamily("pulseboard_db_pool_size", "Open connections in the asyncpg pool.", labels=["pool", "worker"])
+        idle = GaugeMetricFamily("pulseboard_db_pool_idle", "Idle connections in the asyncpg pool.", labels=["pool", "worker"])
+        for name, current in (("primary", pool), ("replica", replica_pool)):
+            if current is not None:
+                size.add_metric([name, worker], current.get_size())
+                idle.add_metric([name, worker], current.get_idle_size())
+        yield size
+        yield idle
+
+REGISTRY.register(PoolCollector())
+
+def create_db_pool(dsn: str, **kwargs):
+    return asyncpg.create_pool(
+        dsn,
+        min_size=POOL_MIN_SIZE,
+        max_size=POOL_MAX_SIZE,
+        statement_cache_size=STATEMENT_CACHE_SIZE,
+        init=init_connection,
+        **kwargs,
+    )
+
+REPLICA_ERRORS = (OSError, asyncio.TimeoutError, asyncpg.PostgresError, asyncpg.InterfaceError)
+
+def replica_unavailable(error: Exception):
+    """Sends reads to the primary for REPLICA_RETRY_SECONDS."""
+    global replica_down_until
+    replica_down_until = time.monotonic() + REPLICA_RETRY_SECONDS
+    REPLICA_FALLBACKS.inc()
+    print(f"Read replica unavailable, reading from the primary for {REPLICA_RETRY_SECONDS}s: {error}")
+
+async def connect_replica():
+    """
+    Creates the replica pool if it does not exist yet.
+
+    Called at startup and again by reads once the retry delay has passed, so
+    a replica that was down when the worker started is picked up later. Only
+    one caller connects at a time; the others keep reading from the primary.
+    """
+    global replica_pool, replica_connecting
+    if replica_pool is not None or replica_connecting:
+        return replica_pool
+    replica_connecting = True
+    try:
+        replica_pool = await create_db_pool(REPLICA_DATABASE_URL, timeout=REPLICA_CONNECT_TIMEOUT)
+        print("Read replica pool created.")
+    except REPLICA_ERRORS as e:
+        replica_unavailable(e)
+    finally:
+        replica_connecting = False
+    return replica_pool
+
+@contextlib.asynccontextmanager
+async def acquire(read: bool = False):
+    """
+    pool.acquire() that records how long the caller waited for a connection.
+
+    With read=True the connection comes from the replica when one is
+    configured. If the replica cannot hand out a connection, reads go to the
+    primary for REPLICA_RETRY_SECONDS before the replica is tried again.
+    """
+    start = time.perf_counter()
+    replica = None
+    if read and REPLICA_DATABASE_URL and time.monotonic() >= replica_down_until:
+        replica = await connect_replica()
+    if replica is not None:
+        try:
+            conn = await replica.acquire()
+        except REPLICA_ERRORS as e:
+            replica_unavailable(e)
+        else:
+            POOL_ACQUIRE_SECONDS.labels("replica").observe(time.perf_counter() - start)
+            try:
+                yield conn
+            finally:
+                await replica.release(conn)
+            return
+    async with pool.acquire() as conn:
+        POOL_ACQUIRE_SECONDS.labels("primary").observe(time.perf_counter() - start)
+        yield conn
+
+class RequestMetricsMiddleware:
+    """
+    Observes REQUEST_SECONDS for every HTTP request, labelled by route template
+    so /api/signals?cursor=... and friends share one series. Latency is taken
+    at the response start, which keeps long-lived streams like /api/feed out
+    of the tail.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                route = scope.get("route")
+                REQUEST_SECONDS.labels(
+                    scope["method"], route.path if route else "unmatched", str(message["status"])
+                ).observe(time.perf_counter() - start)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+app.add_middleware(RequestMetricsMiddleware)
+
+async def init_connection(conn):
+    """Registers a binary JSONB codec so dicts round-trip through queries and COPY, and the query logger."""
+    await conn.set_type_codec(
+        "jsonb",
+        encoder=lambda value: b"\x01" + dump_json(value),
+        decoder=lambda value: load_json(value[1:]),
+        schema="pg_catalog",
+        format="binary",
+    )
+    conn.add_query_logger(log_query)
 
 @app.on_event("startup")
 async def startup():
     global pool
     try:
-        pool = await asyncpg.create_pool(DATABASE_URL)
-        await create_tables()
-        print("Database connection pool created and tables checked/created.")
+        pool = await create_db_pool(DATABASE_URL)
+        if MIGRATE_ON_STARTUP:
+            async with acquire() as conn:
+                await create_tables(conn)
+        print("Database connection pool created.")
+        if REPLICA_DATABASE_URL:
+            await connect_replica()
+        await start_feed_listener()
+        if WRITE_BEHIND:
+            start_ingest_flusher()
     except Exception as e:
         print(f"Failed to connect to database or create tables: {e}")
         # Depending on requirements, you might want to exit or retry
@@ -51,20 +382,57 @@ async def startup():
 @app.on_event("shutdown")
 async def shutdown():
     global pool
+    await stop_ingest_flusher()
+    await stop_feed_listener()
+    if replica_pool:
+        await replica_pool.close()
     if pool:
         await pool.close()
         print("Database connection pool closed.")
 
-async def create_tables():
-    async with pool.acquire() as conn:
+# Bump whenever create_tables changes, so existing databases are migrated on the next start
+SCHEMA_VERSION = 1
+
+def schema_fingerprint() -> str:
+    """SCHEMA_VERSION plus the settings baked into the DDL."""
+    return f"{SCHEMA_VERSION}:slots={STATS_SLOTS}:partitioned={int(PARTITION_SIGNALS)}"
+
+async def schema_current(conn) -> bool:
+    if not await conn.fetchval("SELECT to_regclass('pulseboard_schema_version') IS NOT NULL"):
+        return False
+    return await conn.fetchval("SELECT version FROM pulseboard_schema_version") == schema_fingerprint()
+
+async def create_tables(conn):
+    """
+    Creates or upgrades the schema; safe to run concurrently from several processes.
+
+    Returns early when pulseboard_schema_version already holds the current
+    fingerprint. Even as no-ops, statements like ADD COLUMN IF NOT EXISTS
+    take ACCESS EXCLUSIVE locks and would queue behind long-running readers,
+    blocking every query on the table meanwhile.
+    """
+    if await schema_current(conn):
+        print("Schema is up to date.")
+        return
+    async with conn.transaction():
+        await conn.execute("SELECT pg_advisory_xact_lock(hashtext('pulseboard_migrate'))")
+        # Another process may have finished the migration while we waited for the lock
+        if await schema_current(conn):
+            print("Schema is up to date.")
+            return
+        if PARTITION_SIGNALS:
+            await create_partitioned_signals_table(conn)
+        else:
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS pulseboard_signals (
+                    id SERIAL PRIMARY KEY,
+                    timestamp TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+                    type VARCHAR(255) NOT NULL,
+                    source VARCHAR(255) NOT NULL,
+                    data JSONB
+                );
+            """)
         await conn.execute("""
-            CREATE TABLE IF NOT EXISTS pulseboard_signals (
-                id SERIAL PRIMARY KEY,
-                timestamp TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
-                type VARCHAR(255) NOT NULL,
-                source VARCHAR(255) NOT NULL,
-                data JSONB
-            );
             CREATE TABLE IF NOT EXISTS pulseboard_events (
                 id SERIAL PRIMARY KEY,
                 timestamp TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
@@ -83,77 +451,1327 @@ async def create_tables():
                 data JSONB
             );
         """)
+        # Composite indexes matching the keyset order (timestamp DESC, id DESC)
+        # of the list endpoints, with and without their equality filters.
+        await conn.execute("""
+            CREATE INDEX IF NOT EXISTS pulseboard_signals_ts_id_idx
+                ON pulseboard_signals (timestamp DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS pulseboard_signals_type_ts_id_idx
+                ON pulseboard_signals (type, timestamp DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS pulseboard_signals_source_ts_id_idx
+                ON pulseboard_signals (source, timestamp DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS pulseboard_events_ts_id_idx
+                ON pulseboard_events (timestamp DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS pulseboard_events_source_ts_id_idx
+                ON pulseboard_events (source, timestamp DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS pulseboard_emails_ts_id_idx
+                ON pulseboard_emails (timestamp DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS pulseboard_events_scraped_date_idx
+                ON pulseboard_events ((data->>'scraped_date'));
+        """)
+        await create_search_indexes(conn)
+        # Every insert path (API, batch COPY, scraper) announces new rows on the feed channel.
+        # The table name comes from the trigger argument: on a partitioned table the row
+        # trigger runs as a clone on each partition, where TG_TABLE_NAME is the partition.
+        await conn.execute(f"""
+            CREATE OR REPLACE FUNCTION pulseboard_notify_feed() RETURNS trigger AS $$
+            BEGIN
+                PERFORM pg_notify('{FEED_CHANNEL}', TG_ARGV[0] || ':' || NEW.id);
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+        """)
+        for table, _ in FEED_TABLES.values():
+            await conn.execute(f"""
+                DROP TRIGGER IF EXISTS {table}_notify_feed ON {table};
+                CREATE TRIGGER {table}_notify_feed AFTER INSERT ON {table}
+                    FOR EACH ROW EXECUTE FUNCTION pulseboard_notify_feed('{table}');
+            """)
+        # Natural keys for scraped rows, so re-scraping the same inbox or calendar is idempotent.
+        # Rows created through the API carry no hash and are never deduplicated.
+        await conn.execute("""
+            ALTER TABLE pulseboard_emails ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+            ALTER TABLE pulseboard_events ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64);
+            CREATE UNIQUE INDEX IF NOT EXISTS pulseboard_emails_content_hash_key
+                ON pulseboard_emails (content_hash) WHERE content_hash IS NOT NULL;
+            CREATE UNIQUE INDEX IF NOT EXISTS pulseboard_events_content_hash_key
+                ON pulseboard_events (content_hash) WHERE content_hash IS NOT NULL;
+            CREATE TABLE IF NOT EXISTS pulseboard_scrape_state (
+                source VARCHAR(255) PRIMARY KEY,
+                recent_keys TEXT[] NOT NULL DEFAULT '{}',
+                last_run TIMESTAMPTZ,
+                last_inserted INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+        # Scraper screenshot store: one row per stored (changed) capture, files named by content hash
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS pulseboard_screenshots (
+                id SERIAL PRIMARY KEY,
+                timestamp TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                source VARCHAR(255) NOT NULL,
+                content_hash VARCHAR(64) NOT NULL,
+                perceptual_hash VARCHAR(64) NOT NULL,
+                format VARCHAR(16) NOT NULL,
+                width INTEGER,
+                height INTEGER,
+                size_bytes INTEGER NOT NULL,
+                path TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS pulseboard_screenshots_ts_id_idx
+                ON pulseboard_screenshots (timestamp DESC, id DESC);
+            CREATE INDEX IF NOT EXISTS pulseboard_screenshots_source_ts_id_idx
+                ON pulseboard_screenshots (source, timestamp DESC, id DESC);
+        """)
+        await create_stats_tables(conn)
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS pulseboard_schema_version (version TEXT NOT NULL);
+            DELETE FROM pulseboard_schema_version;
+        """)
+        await conn.execute("INSERT INTO pulseboard_schema_version (version) VALUES ($1)", schema_fingerprint())
     print("Tables checked/created successfully.")
 
+async def create_search_indexes(conn):
+    """
+    Adds the stored tsvector columns and GIN indexes behind /api/search.
+
+    The vectors are generated columns, so every insert path fills them
+    without application code; adding one to an existing table rewrites the
+    table once. jsonb_path_ops indexes on data serve the @> containment filters.
+    """
+    for table, vector, _ in SEARCH_TABLES.values():
+        await conn.execute(f"""
+            ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector
+                GENERATED ALWAYS AS ({vector}) STORED;
+            CREATE INDEX IF NOT EXISTS {table}_search_idx ON {table} USING GIN (search_vector);
+            CREATE INDEX IF NOT EXISTS {table}_data_idx ON {table} USING GIN (data jsonb_path_ops);
+        """)
+
+def add_months(day: datetime.date, months: int) -> datetime.date:
+    """Returns the first day of the month `months` after the month of `day`."""
+    index = day.year * 12 + day.month - 1 + months
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+def signal_partition_name(month: datetime.date) -> str:
+    return f"pulseboard_signals_p{month:%Y%m}"
+
+def month_bound(month: datetime.date) -> datetime.datetime:
+    """Partition bounds are whole UTC months."""
+    return datetime.datetime(month.year, month.month, 1, tzinfo=datetime.timezone.utc)
+
+async def signals_partitioned(conn) -> bool:
+    return await conn.fetchval(
+        "SELECT relkind = 'p' FROM pg_class WHERE oid = to_regclass('pulseboard_signals')"
+    ) or False
+
+async def create_partitioned_signals_table(conn):
+    """
+    Creates pulseboard_signals partitioned by month on timestamp, plus upcoming partitions.
+
+    The primary key has to include the partition key. A DEFAULT partition
+    catches rows outside the created months (back- or far-future-dated
+    signals) so inserts never fail for lack of a partition.
+    """
+    relkind = await conn.fetchval("SELECT relkind FROM pg_class WHERE oid = to_regclass('pulseboard_signals')")
+    if relkind == "r":
+        print("pulseboard_signals exists as a plain table; run `python retention.py --convert` to partition it.")
+        return
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS pulseboard_signals (
+            id SERIAL,
+            timestamp TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            type VARCHAR(255) NOT NULL,
+            source VARCHAR(255) NOT NULL,
+            data JSONB,
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp);
+        CREATE TABLE IF NOT EXISTS pulseboard_signals_default PARTITION OF pulseboard_signals DEFAULT;
+    """)
+    await ensure_signal_partitions(conn)
+
+async def ensure_signal_partitions(conn, first_month: Optional[datetime.date] = None,
+                                   months_ahead: int = PARTITION_MONTHS_AHEAD):
+    """Creates the monthly partitions from `first_month` (default: this month) to `months_ahead` months out."""
+    if not await signals_partitioned(conn):
+        return
+    this_month = datetime.datetime.now(datetime.timezone.utc).date().replace(day=1)
+    month = first_month or this_month
+    while month <= add_months(this_month, months_ahead):
+        await create_signal_partition(conn, month)
+        month = add_months(month, 1)
+
+async def create_signal_partition(conn, month: datetime.date):
+    """
+    Creates and attaches the partition for `month` unless it already exists.
+
+    Rows for that month that landed in the DEFAULT partition are moved into
+    the new table before it is attached; moving them directly between the
+    partitions bypasses the parent's triggers, so stats are not counted twice.
+    """
+    name = signal_partition_name(month)
+    lower, upper = month_bound(month), month_bound(add_months(month, 1))
+    async with conn.transaction():
+        # Serialize partition maintenance across workers and the retention job
+        await conn.execute("SELECT pg_advisory_xact_lock(hashtext('pulseboard_signals_partitions'))")
+        if await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", name):
+            return
+        await conn.execute(f"CREATE TABLE {name} (LIKE pulseboard_signals INCLUDING DEFAULTS INCLUDING GENERATED)")
+        await conn.execute(
+            f"""
+            WITH moved AS (
+                DELETE FROM pulseboard_signals_default WHERE timestamp >= $1 AND timestamp < $2
+                RETURNING id, timestamp, type, source, data
+            )
+            INSERT INTO {name} (id, timestamp, type, source, data) SELECT * FROM moved
+            """,
+            lower, upper,
+        )
+        await conn.execute(
+            f"ALTER TABLE pulseboard_signals ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+    print(f"Created partition {name}.")
+
+def stats_upsert_sql(kind: str, rows: str, removed_rows: Optional[str] = None) -> str:
+    """
+    Builds the statement that folds `rows` of `kind` into the stats rollups.
+
+    Each row counts once towards the overall ("all") counter and once per
+    column in STATS_DIMENSIONS, both in the running totals and in its hourly
+    bucket. Rows in `removed_rows` (the old versions of updated rows) are
+    subtracted the same way. Each connection writes to its own counter slot
+    (see STATS_SLOTS). Upserts are ordered so concurrent writers lock counters
+    in the same order.
+    """
+    values = ", ".join(
+        ["('all', '')"] + [f"('{column}', COALESCE(r.{column}::text, ''))" for column in STATS_DIMENSIONS[kind]]
+    )
+    sources = [(rows, 1)] + ([(removed_rows, -1)] if removed_rows else [])
+    expanded = " UNION ALL ".join(
+        f"""SELECT date_trunc('hour', COALESCE(r.timestamp, now())) AS bucket, d.dimension, d.value, {delta} AS delta
+            FROM {source} r CROSS JOIN LATERAL (VALUES {values}) AS d(dimension, value)"""
+        for source, delta in sources
+    )
+    return f"""
+        WITH expanded AS (
+            {expanded}
+        ), totals AS (
+            INSERT INTO pulseboard_stats_totals (kind, dimension, value, slot, count)
+            SELECT '{kind}', dimension, value, pg_backend_pid() % {STATS_SLOTS}, SUM(delta) FROM expanded
+            GROUP BY dimension, value HAVING SUM(delta) <> 0 ORDER BY dimension, value
+            ON CONFLICT (kind, dimension, value, slot)
+                DO UPDATE SET count = pulseboard_stats_totals.count + EXCLUDED.count
+        )
+        INSERT INTO pulseboard_stats_hourly (kind, bucket, dimension, value, slot, count)
+        SELECT '{kind}', bucket, dimension, value, pg_backend_pid() % {STATS_SLOTS}, SUM(delta) FROM expanded
+        GROUP BY bucket, dimension, value HAVING SUM(delta) <> 0 ORDER BY bucket, dimension, value
+        ON CONFLICT (kind, dimension, value, slot, bucket)
+            DO UPDATE SET count = pulseboard_stats_hourly.count + EXCLUDED.count
+    """
+
+async def create_stats_tables(conn):
+    """
+    Creates the stats rollup tables and the statement-level triggers that keep them current.
+
+    Runs in one transaction: CREATE TRIGGER waits for in-flight inserts and
+    blocks new ones until commit, so a first-time backfill from the base
+    tables neither misses nor double-counts rows.
+    """
+    async with conn.transaction():
+        is_new = await conn.fetchval("SELECT to_regclass('pulseboard_stats_totals') IS NULL")
+        await conn.execute("""
+            CREATE TABLE IF NOT EXISTS pulseboard_stats_totals (
+                kind VARCHAR(32) NOT NULL,
+                dimension VARCHAR(32) NOT NULL,
+                value VARCHAR(255) NOT NULL,
+                slot SMALLINT NOT NULL DEFAULT 0,
+                count BIGINT NOT NULL,
+                PRIMARY KEY (kind, dimension, value, slot)
+            );
+            CREATE TABLE IF NOT EXISTS pulseboard_stats_hourly (
+                kind VARCHAR(32) NOT NULL,
+                dimension VARCHAR(32) NOT NULL,
+                value VARCHAR(255) NOT NULL,
+                slot SMALLINT NOT NULL DEFAULT 0,
+                bucket TIMESTAMPTZ NOT NULL,
+                count BIGINT NOT NULL,
+                PRIMARY KEY (kind, dimension, value, slot, bucket)
+            );
+        """)
+        # Rollups created before counter slots keep their counts in slot 0
+        for table, key in (("pulseboard_stats_totals", "kind, dimension, value, slot"),
+                           ("pulseboard_stats_hourly", "kind, dimension, value, slot, bucket")):
+            if not await conn.fetchval(
+                "SELECT EXISTS (SELECT 1 FROM information_schema.columns WHERE table_name = $1 AND column_name = 'slot')",
+                table,
+            ):
+                await conn.execute(f"""
+                    ALTER TABLE {table} ADD COLUMN slot SMALLINT NOT NULL DEFAULT 0;
+                    ALTER TABLE {table} DROP CONSTRAINT {table}_pkey, ADD PRIMARY KEY ({key});
+                """)
+        for kind, (table, _) in FEED_TABLES.items():
+            await conn.execute(f"""
+                CREATE OR REPLACE FUNCTION pulseboard_stats_{kind}() RETURNS trigger AS $$
+                BEGIN
+                    {stats_upsert_sql(kind, "new_rows")};
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql;
+                DROP TRIGGER IF EXISTS {table}_stats ON {table};
+                CREATE TRIGGER {table}_stats AFTER INSERT ON {table}
+                    REFERENCING NEW TABLE AS new_rows
+                    FOR EACH STATEMENT EXECUTE FUNCTION pulseboard_stats_{kind}();
+
+                -- Updates (e.g. the scraper's upserts flipping is_read) move counts between values
+                CREATE OR REPLACE FUNCTION pulseboard_stats_{kind}_update() RETURNS trigger AS $$
+                BEGIN
+                    {stats_upsert_sql(kind, "new_rows", "old_rows")};
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql;
+                DROP TRIGGER IF EXISTS {table}_stats_update ON {table};
+                CREATE TRIGGER {table}_stats_update AFTER UPDATE ON {table}
+                    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+                    FOR EACH STATEMENT EXECUTE FUNCTION pulseboard_stats_{kind}_update();
+            """)
+            if is_new:
+                await conn.execute(stats_upsert_sql(kind, table))
+
 @app.get("/health", status_code=status.HTTP_200_OK)
 async def health_check():
     """Health check endpoint."""
     if not pool:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database pool not initialized.")
     try:
-        async with pool.acquire() as conn:
+        async with acquire() as conn:
             await conn.execute("SELECT 1")
         return {"status": "ok", "database": "connected"}
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Database connection error: {e}")
 
+# Write-behind state: the bounded queue, its flusher task, whether flushes are currently
+# failing and counters exposed by /api/ingest/stats
+ingest_queue = None
+ingest_flusher_task = None
+ingest_flush_failing = False
+ingest_metrics = {
+    "enqueued": 0,
+    "rejected": 0,
+    "flushed": 0,
+    "retries": 0,
+    "failed": 0,
+    "flushes": 0,
+    "last_batch_size": 0,
+    "last_flush_seconds": 0.0,
+    "max_flush_seconds": 0.0,
+    "total_flush_seconds": 0.0,
+}
+
+async def insert_signal_records(records):
+    """Writes (timestamp, type, source, data) tuples in one transaction with binary COPY."""
+    async with acquire() as conn:
+        async with conn.transaction():
+            await conn.copy_records_to_table(
+                "pulseboard_signals",
+                records=records,
+                columns=["timestamp", "type", "source", "data"],
+            )
+    invalidate_dashboard_cache()
+
+def start_ingest_flusher():
+    """Creates the write-behind queue and starts its background flusher."""
+    global ingest_queue, ingest_flusher_task
+    ingest_queue = asyncio.Queue(maxsize=WRITE_BEHIND_QUEUE_SIZE)
+    ingest_flusher_task = asyncio.ensure_future(flush_ingest_queue())
+    print(f"Write-behind ingest enabled (queue {WRITE_BEHIND_QUEUE_SIZE}, batch {WRITE_BEHIND_BATCH_SIZE}).")
+
+async def stop_ingest_flusher():
+    """Stops accepting signals and waits until everything queued has been written."""
+    global ingest_queue, ingest_flusher_task
+    queue, ingest_queue = ingest_queue, None
+    if queue is None:
+        return
+    await queue.put(None)
+    await ingest_flusher_task
+    ingest_flusher_task = None
+    print(f"Write-behind queue drained ({ingest_metrics['flushed']} signals flushed in total).")
+
+async def flush_ingest_queue():
+    """
+    Coalesces queued signals into multi-row inserts.
+
+    A flush happens once WRITE_BEHIND_BATCH_SIZE signals are waiting or
+    WRITE_BEHIND_FLUSH_SECONDS after the first one arrived, whichever comes
+    first. A None item marks shutdown: everything before it is flushed, then
+    the task exits.
+    """
+    queue = ingest_queue
+    stopping = False
+    while not stopping:
+        first = await queue.get()
+        if first is None:
+            break
+        batch = [first]
+        deadline = time.monotonic() + WRITE_BEHIND_FLUSH_SECONDS
+        while len(batch) < WRITE_BEHIND_BATCH_SIZE:
+            if queue.empty():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = queue.get_nowait()
+            if item is None:
+                stopping = True
+                break
+            batch.append(item)
+
+        if not await flush_ingest_batch(batch):
+            # Shutting down without a database: spill what is still queued without retrying
+            rest = []
+            while not queue.empty():
+                item = queue.get_nowait()
+                if item is not None:
+                    rest.append(item)
+            if rest:
+                spill_ingest_batch(rest)
+            break
+
+async def flush_ingest_batch(batch):
+    """
+    Writes one batch, retrying until it succeeds.
+
+    The signals were already acknowledged with 202, so a failing batch is
+    never dropped while the server runs: it is retried with exponential
+    backoff and new signals are refused meanwhile. Once shutdown has begun,
+    it is spilled to WRITE_BEHIND_SPILL_FILE after a few more attempts and
+    False is returned.
+    """
+    global ingest_flush_failing
+    attempt = 0
+    while True:
+        attempt += 1
+        start = time.perf_counter()
+        try:
+            await insert_signal_records(batch)
+        except Exception as e:
+            print(f"Write-behind flush of {len(batch)} signals failed (attempt {attempt}): {e}")
+            ingest_flush_failing = True
+            ingest_metrics["retries"] += 1
+            if ingest_queue is None and attempt >= WRITE_BEHIND_SHUTDOWN_RETRIES:
+                spill_ingest_batch(batch)
+                return False
+            await asyncio.sleep(min(2 ** (attempt - 1), 1 if ingest_queue is None else WRITE_BEHIND_MAX_BACKOFF_SECONDS))
+            continue
+        if ingest_flush_failing:
+            print(f"Write-behind flush succeeded after {attempt} attempts.")
+            ingest_flush_failing = False
+        elapsed = time.perf_counter() - start
+        ingest_metrics["flushed"] += len(batch)
+        ingest_metrics["flushes"] += 1
+        ingest_metrics["last_batch_size"] = len(batch)
+        ingest_metrics["last_flush_seconds"] = elapsed
+        ingest_metrics["max_flush_seconds"] = max(ingest_metrics["max_flush_seconds"], elapsed)
+        ingest_metrics["total_flush_seconds"] += elapsed
+        return True
+
+def spill_ingest_batch(batch):
+    """Appends signals that could not be written to WRITE_BEHIND_SPILL_FILE."""
+    with open(WRITE_BEHIND_SPILL_FILE, "ab") as f:
+        for timestamp, signal_type, source, data in batch:
+            f.write(dump_json({"timestamp": timestamp, "type": signal_type, "source": source, "data": data}) + b"\n")
+    ingest_metrics["failed"] += len(batch)
+    print(f"Spilled {len(batch)} unwritten signals to {os.path.abspath(WRITE_BEHIND_SPILL_FILE)}.")
+
+@app.get("/api/ingest/stats")
+async def get_ingest_stats():
+    """Write-behind queue depth, throughput counters and flush latency."""
+    flushes = ingest_metrics["flushes"]
+    return {
+        "write_behind": WRITE_BEHIND,
+        "flush_failing": ingest_flush_failing,
+        "queue_depth": ingest_queue.qsize() if ingest_queue else 0,
+        "queue_capacity": WRITE_BEHIND_QUEUE_SIZE,
+        **ingest_metrics,
+        "avg_flush_seconds": ingest_metrics["total_flush_seconds"] / flushes if flushes else 0.0,
+    }
+
+class IngestCollector:
+    """Exposes the write-behind counters of /api/ingest/stats to Prometheus."""
+
+    def collect(self):
+        for name in ("enqueued", "rejected", "flushed", "retries", "failed", "flushes"):
+            yield CounterMetricFamily(
+                f"pulseboard_ingest_{name}", f"Write-behind signals/flushes: {name}.", value=ingest_metrics[name]
+            )
+        yield GaugeMetricFamily(
+            "pulseboard_ingest_queue_depth", "Signals waiting in the write-behind queue.",
+            value=ingest_queue.qsize() if ingest_queue else 0,
+        )
+        yield CounterMetricFamily(
+            "pulseboard_ingest_flush_seconds", "Total time spent in write-behind flushes.",
+            value=ingest_metrics["total_flush_seconds"],
+        )
+
+REGISTRY.register(IngestCollector())
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus metrics: route latency, pool, query timings and write-behind counters.
+
+    Under PROMETHEUS_MULTIPROC_DIR the histograms and counters are summed
+    over all workers; pool and write-behind values are the serving worker's.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        registry.register(PoolCollector())
+        registry.register(IngestCollector())
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.post("/api/signals", status_code=status.HTTP_201_CREATED)
 async def create_signal(signal: Signal):
-    """Create a new signal."""
+    """
+    Create a new signal.
+
+    In write-behind mode the signal is queued and 202 Accepted is returned
+    immediately; a full queue answers 503 with Retry-After.
+    """
     if not pool:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database pool not initialized.")
-    async with pool.acquire() as conn:
+    if WRITE_BEHIND:
+        if ingest_queue is None:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Ingest queue not accepting signals.")
+        if ingest_flush_failing:
+            # Queued signals cannot be written right now; do not take on more
+            ingest_metrics["rejected"] += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Ingest is retrying a failed write, retry later.",
+                headers={"Retry-After": "5"},
+            )
+        try:
+            ingest_queue.put_nowait((signal.timestamp, signal.type, signal.source, signal.data))
+        except asyncio.QueueFull:
+            ingest_metrics["rejected"] += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Ingest queue is full, retry later.",
+                headers={"Retry-After": "1"},
+            )
+        ingest_metrics["enqueued"] += 1
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"message": "Signal accepted for processing", "signal": jsonable_encoder(signal)},
+        )
+    async with acquire() as conn:
         await conn.execute(
             "INSERT INTO pulseboard_signals (timestamp, type, source, data) VALUES ($1, $2, $3, $4)",
             signal.timestamp, signal.type, signal.source, signal.data
         )
+    invalidate_dashboard_cache()
     return {"message": "Signal created successfully", "signal": signal.dict()}
 
-@app.get("/api/signals", response_model=List[Signal])
-async def get_signals():
-    """Retrieve all signals."""
+def format_validation_error(error: ValidationError) -> str:
+    """Flattens a Pydantic validation error into a single readable line."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in error.errors()
+    )
+
+async def iter_batch_items(request: Request):
+    """Yields raw items from a JSON array body or a streamed NDJSON body."""
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        # Parse NDJSON line by line as chunks arrive instead of buffering the whole body
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield line
+        if buffer.strip():
+            yield buffer
+        return
+
+    try:
+        items = json.loads(await request.body())
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid JSON body: {e}")
+    if not isinstance(items, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Batch body must be a JSON array of signals.")
+    for item in items:
+        yield item
+
+@app.post("/api/signals/batch", status_code=status.HTTP_201_CREATED)
+async def create_signals_batch(request: Request, partial: bool = False):
+    """
+    Create many signals in one transaction.
+
+    Accepts a JSON array or an NDJSON body (Content-Type: application/x-ndjson).
+    The whole batch is validated before anything is written: by default one
+    invalid item rejects the batch, while `?partial=true` stores the valid
+    items and reports the rest.
+    """
     if not pool:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database pool not initialized.")
-    async with pool.acquire() as conn:
-        # Note: asyncpg.Record objects can be directly unpacked into Pydantic models
-        # if the column names match the model's field names.
-        rows = await conn.fetch("SELECT timestamp, type, source, data FROM pulseboard_signals ORDER BY timestamp DESC")
-    return [Signal(**row) for row in rows]
 
-@app.get("/api/events", response_model=List[Event])
-async def get_events():
-    """Retrieve all events."""
+    records = []
+    errors = []
+    index = 0
+    async for item in iter_batch_items(request):
+        if index >= MAX_BATCH_SIZE:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Batch exceeds the maximum of {MAX_BATCH_SIZE} signals.",
+            )
+        try:
+            if isinstance(item, bytes):
+                item = json.loads(item)
+            if not isinstance(item, dict):
+                raise ValueError("item must be a JSON object")
+            signal = Signal(**item)
+            records.append((signal.timestamp, signal.type, signal.source, signal.data))
+        except ValidationError as e:
+            errors.append({"index": index, "error": format_validation_error(e)})
+        except ValueError as e:
+            # Also covers json.JSONDecodeError for malformed NDJSON lines
+            errors.append({"index": index, "error": str(e)})
+        index += 1
+
+    if errors and not partial:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail={"message": "Batch rejected: some signals are invalid.", "errors": errors},
+        )
+    if not records:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail={"message": "No valid signals in batch.", "errors": errors},
+        )
+
+    # One round trip for the whole batch: binary COPY inside a single transaction
+    await insert_signal_records(records)
+    return {"message": "Signals created successfully", "inserted": len(records), "errors": errors}
+
+def encode_cursor(timestamp: datetime.datetime, row_id: int) -> str:
+    """Encodes the (timestamp, id) keyset position of a row as an opaque cursor."""
+    raw = f"{timestamp.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+def decode_cursor(cursor: str):
+    """Decodes a cursor produced by encode_cursor back into (timestamp, id)."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        timestamp, row_id = raw.rsplit("|", 1)
+        return datetime.datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor.")
+
+def build_filters(since: Optional[datetime.datetime], until: Optional[datetime.datetime], **filters):
+    """Builds WHERE conditions and their arguments; equality filters set to None are skipped."""
+    conditions = []
+    args = []
+    for column, value in filters.items():
+        if value is not None:
+            args.append(value)
+            conditions.append(f"{column} = ${len(args)}")
+    if since is not None:
+        args.append(since)
+        conditions.append(f"timestamp >= ${len(args)}")
+    if until is not None:
+        args.append(until)
+        conditions.append(f"timestamp < ${len(args)}")
+    return conditions, args
+
+async def fetch_page(table: str, columns: str, *, limit: int, cursor: Optional[str], accept: Optional[str],
+                     since: Optional[datetime.datetime], until: Optional[datetime.datetime], **filters) -> Response:
+    """
+    Fetches one page of `table` newest first using keyset pagination on (timestamp, id).
+
+    When more rows remain, the cursor for the next page is returned in the
+    X-Next-Cursor header.
+    """
     if not pool:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database pool not initialized.")
-    async with pool.acquire() as conn:
-        rows = await conn.fetch("SELECT timestamp, name, description, source, data FROM pulseboard_events ORDER BY timestamp DESC")
-    return [Event(**row) for row in rows]
+
+    conditions, args = build_filters(since, until, **filters)
+    if cursor is not None:
+        args.extend(decode_cursor(cursor))
+        conditions.append(f"(timestamp, id) < (${len(args) - 1}, ${len(args)})")
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    # Fetch one extra row to learn whether another page exists
+    args.append(limit + 1)
+    query = f"SELECT id, {columns} FROM {table} {where} ORDER BY timestamp DESC, id DESC LIMIT ${len(args)}"
+
+    async with acquire(read=True) as conn:
+        rows = await conn.fetch(query, *args)
+
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(rows[-1]["timestamp"], rows[-1]["id"])
+    return records_response(rows, accept, headers, exclude=("id",))
+
+@app.get("/api/signals", response_model=List[Signal])
+async def get_signals(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+    signal_type: Optional[str] = Query(None, alias="type"),
+    source: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+):
+    """Retrieve signals, newest first, one page at a time."""
+    return await fetch_page(
+        "pulseboard_signals", "timestamp, type, source, data",
+        limit=limit, cursor=cursor, accept=accept, since=since, until=until, type=signal_type, source=source,
+    )
+
+@app.get("/api/events", response_model=List[Event])
+async def get_events(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+    source: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+):
+    """Retrieve events, newest first, one page at a time."""
+    return await fetch_page(
+        "pulseboard_events", "timestamp, name, description, source, data",
+        limit=limit, cursor=cursor, accept=accept, since=since, until=until, source=source,
+    )
 
 @app.get("/api/emails", response_model=List[Email])
-async def get_emails():
-    """Retrieve all emails."""
+async def get_emails(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+    accept: Optional[str] = Header(None),
+):
+    """Retrieve emails, newest first, one page at a time."""
+    return await fetch_page(
+        "pulseboard_emails", "timestamp, sender, subject, body_snippet, is_read, data",
+        limit=limit, cursor=cursor, accept=accept, since=since, until=until,
+    )
+
+@app.get("/api/screenshots", response_model=List[Screenshot])
+async def get_screenshots(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+    source: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+):
+    """Retrieve stored scraper screenshots (metadata only), newest first, one page at a time."""
+    return await fetch_page(
+        "pulseboard_screenshots", "timestamp, source, content_hash, perceptual_hash, format, width, height, size_bytes, path",
+        limit=limit, cursor=cursor, accept=accept, since=since, until=until, source=source,
+    )
+
+def json_default(value):
+    """JSON encoder fallback for the column types asyncpg returns."""
+    if isinstance(value, datetime.datetime):
+        # UTC as "Z", matching orjson's OPT_UTC_Z output
+        return value.isoformat().replace("+00:00", "Z")
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+# orjson only handles integers in the int64/uint64 range: it refuses to encode others and
+# decodes them as floats. Integers down to -9999999999999999999 are outside it with 19
+# digits, so any run of 19+ digits sends a document to the json module instead.
+LONG_NUMBER = re.compile(rb"\d{19}")
+
+def dump_json(value) -> bytes:
+    """Encodes to JSON bytes with orjson when installed, which handles datetimes natively."""
+    if orjson:
+        try:
+            return orjson.dumps(value, default=json_default, option=orjson.OPT_UTC_Z)
+        except orjson.JSONEncodeError:
+            pass  # e.g. an integer wider than 64 bits; the json module encodes it exactly
+    return json.dumps(value, default=json_default, separators=(",", ":")).encode("utf-8")
+
+def load_json(value: bytes):
+    if orjson and not LONG_NUMBER.search(value):
+        return orjson.loads(value)
+    return json.loads(value)
+
+def records_response(rows, accept: Optional[str] = None, headers: Optional[dict] = None,
+                     exclude: tuple = ()) -> Response:
+    """
+    Encodes asyncpg records straight into the response body.
+
+    Columns are already typed by asyncpg and the JSONB codec, so no Pydantic
+    model is built per row and nothing is re-validated through response_model.
+    Clients that list a msgpack media type in Accept get msgpack instead of
+    JSON, with timestamps as msgpack Timestamp extension values.
+    """
+    items = [{key: value for key, value in row.items() if key not in exclude} for row in rows]
+    headers = {**(headers or {}), "Vary": "Accept"}
+    if msgpack and accept and any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES):
+        return Response(msgpack.packb(items, datetime=True), media_type="application/msgpack", headers=headers)
+    return Response(dump_json(items), media_type="application/json", headers=headers)
+
+def export_response(table: str, columns: str, since: Optional[datetime.datetime],
+                    until: Optional[datetime.datetime], **filters) -> StreamingResponse:
+    """
+    Streams every matching row of `table` as NDJSON, oldest first.
+
+    Rows are read through a server-side cursor EXPORT_CHUNK_SIZE at a time and
+    each chunk is written out before the next is fetched, so memory stays flat
+    regardless of table size.
+    """
     if not pool:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database pool not initialized.")
-    async with pool.acquire() as conn:
-        rows = await conn.fetch("SELECT timestamp, sender, subject, body_snippet, is_read, data FROM pulseboard_emails ORDER BY timestamp DESC")
-    return [Email(**row) for row in rows]
 
-@app.get("/api/dashboard-data")
-async def get_dashboard_data():
-    """Retrieve combined data for the dashboard."""
+    conditions, args = build_filters(since, until, **filters)
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    query = f"SELECT {columns} FROM {table} {where} ORDER BY timestamp, id"
+
+    async def generate():
+        async with acquire(read=True) as conn:
+            # Server-side cursors only live inside a transaction
+            async with conn.transaction(readonly=True):
+                cur = await conn.cursor(query, *args)
+                while True:
+                    rows = await cur.fetch(EXPORT_CHUNK_SIZE)
+                    if not rows:
+                        break
+                    yield b"".join(dump_json(dict(row)) + b"\n" for row in rows)
+
+    return StreamingResponse(generate(), media_type="application/x-ndjson")
+
+@app.get("/api/signals/export")
+async def export_signals(
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+    signal_type: Optional[str] = Query(None, alias="type"),
+    source: Optional[str] = None,
+):
+    """Export all matching signals as NDJSON."""
+    return export_response(
+        "pulseboard_signals", "timestamp, type, source, data",
+        since, until, type=signal_type, source=source,
+    )
+
+@app.get("/api/events/export")
+async def export_events(
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+    source: Optional[str] = None,
+):
+    """Export all matching events as NDJSON."""
+    return export_response(
+        "pulseboard_events", "timestamp, name, description, source, data",
+        since, until, source=source,
+    )
+
+@app.get("/api/emails/export")
+async def export_emails(
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+):
+    """Export all matching emails as NDJSON."""
+    return export_response(
+        "pulseboard_emails", "timestamp, sender, subject, body_snippet, is_read, data",
+        since, until,
+    )
+
+def parse_data_filter(request: Request, data: Optional[str]) -> Optional[dict]:
+    """
+    Builds the JSONB containment document from `data` (a JSON object) and any
+    `data.<key>=<value>` query parameters, e.g. data.captured_via=extension.
+    Dotted keys nest, so data.page.url=... matches {"page": {"url": ...}}.
+    Values given this way are always JSON strings. Filters that contradict
+    each other are rejected, whatever their order.
+    """
+    document = {}
+    if data is not None:
+        try:
+            document = json.loads(data)
+        except json.JSONDecodeError:
+            document = None
+        if not isinstance(document, dict):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="data must be a JSON object.")
+    for key, value in request.query_params.multi_items():
+        if not key.startswith("data.") or key == "data.":
+            continue
+        *parents, leaf = key[5:].split(".")
+        node = document
+        for parent in parents:
+            node = node.setdefault(parent, {})
+            if not isinstance(node, dict):
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Conflicting data filter {key}.")
+        # A key already holding an object (data.a.b before data.a) or another value conflicts too
+        if node.get(leaf, value) != value:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Conflicting data filter {key}.")
+        node[leaf] = value
+    return document or None
+
+@app.get("/api/search")
+async def search(
+    request: Request,
+    q: Optional[str] = None,
+    kind: Optional[str] = None,
+    data: Optional[str] = None,
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    accept: Optional[str] = Header(None),
+):
+    """
+    Ranked full-text search over signals, events and emails.
+
+    `q` uses web search syntax ("quoted phrases", OR, -exclusions) against the
+    stored search vectors; `data` / `data.<key>` filter by JSONB containment.
+    Both are answered from GIN indexes. The newest SEARCH_RANK_WINDOW matches
+    of each requested kind (comma-separated `kind`, default all) are ranked
+    and merged by rank, then recency.
+    """
     if not pool:
         raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database pool not initialized.")
-    async with pool.acquire() as conn:
-        signals_raw = await conn.fetch("SELECT timestamp, type, source, data FROM pulseboard_signals ORDER BY timestamp DESC LIMIT 10")
-        events_raw = await conn.fetch("SELECT timestamp, name, description, source, data FROM pulseboard_events ORDER BY timestamp DESC LIMIT 10")
-        emails_raw = await conn.fetch("SELECT timestamp, sender, subject, body_snippet, is_read, data FROM pulseboard_emails ORDER BY timestamp DESC LIMIT 10")
+    kinds = [k.strip() for k in kind.split(",") if k.strip()] if kind else list(SEARCH_TABLES)
+    unknown = [k for k in kinds if k not in SEARCH_TABLES]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown kind {', '.join(unknown)}; expected {', '.join(SEARCH_TABLES)}.",
+        )
+    containment = parse_data_filter(request, data)
+    if not (q and q.strip()) and containment is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Provide q or a data filter.")
+
+    conditions, args = build_filters(since, until)
+    rank = "NULL::real"
+    if q and q.strip():
+        args.append(q)
+        query = f"websearch_to_tsquery('{SEARCH_CONFIG}', ${len(args)})"
+        conditions.append(f"search_vector @@ {query}")
+        rank = f"ts_rank_cd(search_vector, {query})"
+    if containment is not None:
+        args.append(containment)
+        conditions.append(f"data @> ${len(args)}::jsonb")
+    args.append(limit)
+
+    results = []
+    async with acquire(read=True) as conn:
+        for name in kinds:
+            table, _, columns = SEARCH_TABLES[name]
+            # Only the newest SEARCH_RANK_WINDOW matches are ranked, so a term found
+            # in millions of rows costs a bounded index walk instead of a full sort
+            rows = await conn.fetch(
+                f"""
+                SELECT * FROM (
+                    SELECT id, {columns}, {rank} AS rank FROM {table}
+                    WHERE {' AND '.join(conditions)}
+                    ORDER BY timestamp DESC, id DESC
+                    LIMIT {SEARCH_RANK_WINDOW}
+                ) AS matches
+                ORDER BY rank DESC NULLS LAST, timestamp DESC, id DESC
+                LIMIT ${len(args)}
+                """,
+                *args,
+            )
+            results.extend({"kind": name, **row} for row in rows)
+
+    results.sort(key=lambda item: (item["rank"] or 0, item["timestamp"]), reverse=True)
+    return records_response(results[:limit], accept, exclude=("id",))
+
+# Live feed state: one LISTEN connection per worker fanning out to every SSE subscriber
+feed_connection = None
+feed_subscribers = set()
+feed_pending = {}
+feed_flush_task = None
+
+async def start_feed_listener(reconnect: bool = False):
+    """
+    Opens the dedicated LISTEN connection for this worker.
+
+    Notifications sent while a dropped connection was down are lost, so on
+    reconnect every open stream is ended; clients come back with their
+    Last-Event-ID and the backfill replays what they missed.
+    """
+    global feed_connection
+    try:
+        feed_connection = await asyncpg.connect(LISTEN_DATABASE_URL)
+        await feed_connection.add_listener(FEED_CHANNEL, on_feed_notification)
+        feed_connection.add_termination_listener(on_feed_connection_lost)
+        print(f"Listening for new rows on channel {FEED_CHANNEL}.")
+    except Exception as e:
+        feed_connection = None
+        print(f"Failed to start live feed listener: {e}")
+        if reconnect:
+            schedule_feed_reconnect()
+        return
+    if reconnect:
+        invalidate_dashboard_cache()
+        for queue in list(feed_subscribers):
+            drop_feed_subscriber(queue)
+
+async def stop_feed_listener():
+    """Closes the LISTEN connection and ends every open feed stream."""
+    global feed_connection
+    connection, feed_connection = feed_connection, None
+    if connection:
+        await connection.close()
+    for queue in list(feed_subscribers):
+        drop_feed_subscriber(queue)
+
+def on_feed_connection_lost(connection):
+    """Reconnects the LISTEN connection if it drops while the server is running."""
+    global feed_connection
+    if feed_connection is connection:
+        print("Live feed listener connection lost, reconnecting.")
+        feed_connection = None
+        schedule_feed_reconnect()
+
+def schedule_feed_reconnect():
+    asyncio.get_running_loop().call_later(1, lambda: asyncio.ensure_future(start_feed_listener(reconnect=True)))
+
+def on_feed_notification(connection, pid, channel, payload):
+    """Collects notified row ids; rows are loaded and fanned out in short batches."""
+    global feed_flush_task
+    # Inserts from other workers and the scraper arrive here too
+    invalidate_dashboard_cache()
+    table, _, row_id = payload.partition(":")
+    for kind, (kind_table, _) in FEED_TABLES.items():
+        if kind_table == table:
+            feed_pending.setdefault(kind, []).append(int(row_id))
+    if feed_subscribers and feed_flush_task is None:
+        feed_flush_task = asyncio.ensure_future(flush_feed())
+    elif not feed_subscribers:
+        feed_pending.clear()
+
+async def flush_feed():
+    """Loads the pending rows with one query per table and queues them for every subscriber."""
+    global feed_flush_task
+    try:
+        await asyncio.sleep(FEED_COALESCE_SECONDS)
+        pending = dict(feed_pending)
+        feed_pending.clear()
+        items = []
+        async with acquire() as conn:
+            for kind, ids in pending.items():
+                table, columns = FEED_TABLES[kind]
+                rows = await conn.fetch(f"SELECT id, {columns} FROM {table} WHERE id = ANY($1::int[]) ORDER BY id", ids)
+                items.extend((kind, dict(row)) for row in rows)
+        for queue in list(feed_subscribers):
+            for item in items:
+                try:
+                    queue.put_nowait(item)
+                except asyncio.QueueFull:
+                    # A subscriber that cannot keep up is disconnected; it resumes via Last-Event-ID
+                    drop_feed_subscriber(queue)
+                    break
+    except Exception as e:
+        print(f"Error fanning out live feed rows: {e}")
+    finally:
+        feed_flush_task = None
+        if feed_pending and feed_subscribers:
+            feed_flush_task = asyncio.ensure_future(flush_feed())
+
+def drop_feed_subscriber(queue: asyncio.Queue):
+    """Removes a subscriber and wakes its stream so it closes."""
+    feed_subscribers.discard(queue)
+    while not queue.empty():
+        queue.get_nowait()
+    queue.put_nowait(None)
+
+def encode_feed_id(marks: dict) -> str:
+    """Encodes the last delivered id per kind as an SSE event id, e.g. "12.4.30"."""
+    return ".".join(str(marks[kind]) for kind in FEED_TABLES)
+
+def decode_feed_id(value: str) -> dict:
+    """Decodes an SSE event id produced by encode_feed_id."""
+    try:
+        ids = [int(part) for part in value.split(".")]
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid feed event id.")
+    if len(ids) != len(FEED_TABLES):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid feed event id.")
+    return dict(zip(FEED_TABLES, ids))
+
+def format_feed_event(kind: str, row: dict, marks: dict) -> str:
+    """Renders one row as an SSE message."""
+    return f"id: {encode_feed_id(marks)}\nevent: {kind}\ndata: {dump_json(row).decode('utf-8')}\n\n"
+
+@app.get("/api/feed")
+async def live_feed(
+    request: Request,
+    last_event_id: Optional[str] = Header(None),
+    resume_from: Optional[str] = Query(None, alias="last_event_id"),
+):
+    """
+    Server-Sent Events stream of newly inserted signals, events and emails.
+
+    Reconnecting clients send their last event id (the Last-Event-ID header
+    that EventSource sets automatically, or ?last_event_id=) and first receive
+    the rows they missed, read FEED_BACKFILL_LIMIT rows at a time until
+    caught up. A client further behind than FEED_BACKFILL_MAX_ROWS rows of a
+    kind gets a "reset" event for that kind, meaning "reload", and continues
+    from the newest row.
+    """
+    if not pool:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database pool not initialized.")
+    if not feed_connection:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Live feed not available.")
+
+    resume_id = last_event_id or resume_from
+    marks = decode_feed_id(resume_id) if resume_id else None
+
+    # Subscribe before reading the backfill so nothing inserted in between is lost
+    queue = asyncio.Queue(maxsize=FEED_QUEUE_SIZE)
+    feed_subscribers.add(queue)
+
+    async def generate():
+        nonlocal marks
+        backfilled = set()
+        try:
+            if marks is None:
+                marks = {}
+                async with acquire() as conn:
+                    for kind, (table, _) in FEED_TABLES.items():
+                        marks[kind] = await conn.fetchval(f"SELECT COALESCE(MAX(id), 0) FROM {table}")
+                yield f"id: {encode_feed_id(marks)}\nevent: ready\ndata: {{}}\n\n"
+            else:
+                for kind, (table, columns) in FEED_TABLES.items():
+                    replayed = 0
+                    while True:
+                        # Each page is read and the connection given back before it is written
+                        # to the client, so a slow reader never holds a pooled connection
+                        async with acquire() as conn:
+                            rows = await conn.fetch(
+                                f"SELECT id, {columns} FROM {table} WHERE id > $1 ORDER BY id LIMIT $2",
+                                marks[kind], FEED_BACKFILL_LIMIT,
+                            )
+                        for row in rows:
+                            marks[kind] = row["id"]
+                            backfilled.add((kind, row["id"]))
+                            yield format_feed_event(kind, dict(row), marks)
+                        replayed += len(rows)
+                        if len(rows) < FEED_BACKFILL_LIMIT:
+                            break
+                        if replayed >= FEED_BACKFILL_MAX_ROWS:
+                            async with acquire() as conn:
+                                marks[kind] = await conn.fetchval(f"SELECT COALESCE(MAX(id), $1) FROM {table}", marks[kind])
+                            yield f"id: {encode_feed_id(marks)}\nevent: reset\ndata: {dump_json({'kind': kind}).decode('utf-8')}\n\n"
+                            break
+
+            while not await request.is_disconnected():
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout=FEED_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if item is None:
+                    break
+                kind, row = item
+                if (kind, row["id"]) in backfilled:
+                    continue
+                # Ids can commit out of order, so the mark only ever moves forward
+                marks[kind] = max(marks[kind], row["id"])
+                yield format_feed_event(kind, row, marks)
+        finally:
+            feed_subscribers.discard(queue)
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/api/stats")
+async def get_stats(
+    since: Optional[datetime.datetime] = None,
+    until: Optional[datetime.datetime] = None,
+    bucket: str = "hour",
+):
+    """
+    Retrieve totals, per-dimension breakdowns and a time-bucketed series per kind.
+
+    Reads only the rollup tables, so the cost depends on the number of
+    buckets and distinct values, not on the number of stored rows. The
+    series covers the last 24 hours unless `since`/`until` are given and is
+    bucketed by `hour` or `day` (UTC days, matching the compacted rollups).
+    """
+    if not pool:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database pool not initialized.")
+    if bucket not in ("hour", "day"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="bucket must be 'hour' or 'day'.")
+    if until is None:
+        until = datetime.datetime.now(datetime.timezone.utc)
+    if since is None:
+        since = until - datetime.timedelta(hours=24)
+
+    async with acquire(read=True) as conn:
+        totals_raw = await conn.fetch(
+            "SELECT kind, dimension, value, SUM(count)::bigint AS count FROM pulseboard_stats_totals GROUP BY 1, 2, 3"
+        )
+        series_raw = await conn.fetch(
+            """
+            SELECT kind, date_trunc($1, bucket, 'UTC') AS bucket, SUM(count)::bigint AS count
+            FROM pulseboard_stats_hourly
+            WHERE dimension = 'all' AND value = '' AND bucket >= date_trunc('hour', $2::timestamptz) AND bucket < $3
+            GROUP BY 1, 2
+            ORDER BY 1, 2
+            """,
+            bucket, since, until,
+        )
+
+    totals = {kind: 0 for kind in STATS_DIMENSIONS}
+    breakdown = {kind: {dimension: {} for dimension in dimensions} for kind, dimensions in STATS_DIMENSIONS.items()}
+    for row in totals_raw:
+        if row["dimension"] == "all":
+            totals[row["kind"]] = row["count"]
+        elif row["dimension"] in breakdown.get(row["kind"], {}):
+            breakdown[row["kind"]][row["dimension"]][row["value"]] = row["count"]
+    series = {kind: [] for kind in STATS_DIMENSIONS}
+    for row in series_raw:
+        series.setdefault(row["kind"], []).append({"bucket": row["bucket"], "count": row["count"]})
 
     return {
-        "signals": [Signal(**row) for row in signals_raw],
-        "events": [Event(**row) for row in events_raw],
-        "emails": [Email(**row) for row in emails_raw]
+        "since": since,
+        "until": until,
+        "bucket": bucket,
+        "totals": totals,
+        "breakdown": breakdown,
+        "series": series,
     }
 
+# Rendered /api/dashboard-data snapshot and the rebuild in flight, if any; the version
+# is bumped by every write so a rebuild that raced with an insert is not cached
+dashboard_cache = None
+dashboard_cache_version = 0
+dashboard_build = None
+
+def invalidate_dashboard_cache():
+    """Drops the cached dashboard snapshot after a write."""
+    global dashboard_cache, dashboard_cache_version
+    dashboard_cache = None
+    dashboard_cache_version += 1
+
+async def fetch_latest(query: str):
+    """Runs one dashboard query on its own pooled connection."""
+    async with acquire(read=True) as conn:
+        return await conn.fetch(query)
+
+async def build_dashboard_snapshot():
+    """Runs the dashboard queries concurrently and renders the JSON body and its ETag."""
+    stats_raw, upcoming_raw, signals_raw, events_raw, emails_raw = await asyncio.gather(
+        # Counters for the stats bar come from the rollup tables, never from COUNT(*)
+        fetch_latest("""
+            SELECT
+                (SELECT SUM(count)::bigint FROM pulseboard_stats_totals WHERE kind = 'signals' AND dimension = 'all') AS total_signals,
+                (SELECT SUM(count)::bigint FROM pulseboard_stats_totals WHERE kind = 'emails' AND dimension = 'is_read' AND value = 'false') AS unread_emails,
+                (SELECT SUM(count)::bigint FROM pulseboard_stats_totals WHERE kind = 'emails' AND dimension = 'all') AS total_emails
+        """),
+        # Calendar events scraped for today or a later day, plus events stored with a future timestamp
+        fetch_latest("""
+            SELECT count(*) AS upcoming_events FROM pulseboard_events
+            WHERE data->>'scraped_date' >= to_char(current_date, 'YYYY-MM-DD') OR timestamp >= now()
+        """),
+        fetch_latest("SELECT timestamp, type, source, data FROM pulseboard_signals ORDER BY timestamp DESC LIMIT 10"),
+        fetch_latest("SELECT timestamp, name, description, source, data FROM pulseboard_events ORDER BY timestamp DESC LIMIT 10"),
+        fetch_latest("SELECT timestamp, sender, subject, body_snippet, is_read, data FROM pulseboard_emails ORDER BY timestamp DESC LIMIT 10"),
+    )
+    stats = stats_raw[0]
+    body = dump_json({
+        "stats": {
+            "totalSignals": stats["total_signals"] or 0,
+            "pendingActions": stats["unread_emails"] or 0,
+            "upcomingEvents": upcoming_raw[0]["upcoming_events"],
+            "emailsProcessed": stats["total_emails"] or 0,
+        },
+        "signals": [dict(row) for row in signals_raw],
+        "events": [dict(row) for row in events_raw],
+        "emails": [dict(row) for row in emails_raw],
+    })
+    etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    return {"body": body, "etag": etag, "expires": time.monotonic() + DASHBOARD_CACHE_TTL}
+
+async def rebuild_dashboard():
+    """Builds a snapshot for every waiting request; it is cached only if no write happened meanwhile."""
+    global dashboard_cache, dashboard_build
+    version = dashboard_cache_version
+    try:
+        snapshot = await build_dashboard_snapshot()
+        if version == dashboard_cache_version:
+            dashboard_cache = snapshot
+        return snapshot
+    finally:
+        dashboard_build = None
+
+@app.get("/api/dashboard-data")
+async def get_dashboard_data(if_none_match: Optional[str] = Header(None)):
+    """
+    Retrieve combined data for the dashboard.
+
+    Served from an in-process snapshot that expires after DASHBOARD_CACHE_TTL
+    seconds or on the next write. Clients sending a matching If-None-Match get
+    304 Not Modified.
+    """
+    global dashboard_build
+    if not pool:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Database pool not initialized.")
+
+    snapshot = dashboard_cache
+    if snapshot is None or snapshot["expires"] <= time.monotonic():
+        # Only one rebuild runs at a time and every request that finds the cache
+        # stale meanwhile shares its result, even if a write keeps it from being cached
+        if dashboard_build is None:
+            dashboard_build = asyncio.ensure_future(rebuild_dashboard())
+        # Shielded so a client disconnecting does not cancel the build for the others
+        snapshot = await asyncio.shield(dashboard_build)
+
+    headers = {"ETag": snapshot["etag"], "Cache-Control": "no-cache"}
+    if if_none_match and snapshot["etag"] in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=snapshot["body"], media_type="application/json", headers=headers)
+
+async def migrate():
+    """One-shot schema migration, run before starting the workers."""
+    conn = await asyncpg.connect(DATABASE_URL, statement_cache_size=STATEMENT_CACHE_SIZE)
+    try:
+        await init_connection(conn)
+        await create_tables(conn)
+    finally:
+        await conn.close()
+
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=18880)
+    parser = argparse.ArgumentParser(description="PulseBoard API server.")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="uvicorn worker processes")
+    parser.add_argument("--port", type=int, default=18880)
+    parser.add_argument("--migrate", action="store_true", help="create/upgrade the schema and exit")
+    args = parser.parse_args()
+    if args.migrate:
+        asyncio.run(migrate())
+    elif args.workers > 1:
+        # Migrate once here instead of in every worker, and aggregate the workers'
+        # histograms and counters for /metrics when PROMETHEUS_MULTIPROC_DIR is set
+        asyncio.run(migrate())
+        os.environ["PULSEBOARD_MIGRATE_ON_STARTUP"] = "0"
+        metrics_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+        if metrics_dir:
+            # Drop files left by earlier runs (and by this process's own import)
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+            os.makedirs(metrics_dir)
+        # Hand over to the uvicorn CLI so this script is not re-imported as the
+        # main module of every worker process
+        os.execv(sys.executable, [
+            sys.executable, "-m", "uvicorn", "server:app",
+            # Workers import server.py from this directory, not from wherever we were started
+            "--app-dir", os.path.dirname(os.path.abspath(__file__)),
+            "--host", "0.0.0.0", "--port", str(args.port), "--workers", str(args.workers),
+        ])
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=args.port)
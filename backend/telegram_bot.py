@@ -2,10 +2,13 @@ import os
 import logging
 import asyncio
 from telegram import Update, Bot
-from telegram.ext import Application, CommandHandler, ContextTypes
+from telegram.error import Forbidden, RetryAfter, TelegramError
+from telegram.ext import Application, CommandHandler, ContextTypes, PicklePersistence
+from telegram.helpers import escape_markdown
 import httpx
 import json
 import datetime
+import time
 
 # Configure logging
 logging.basicConfig(
@@ -13,12 +16,98 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# FastAPI server URL
-FASTAPI_URL = "http://localhost:18880"
+# FastAPI server URL; point it at a stub backend for local testing
+FASTAPI_URL = os.environ.get("PULSEBOARD_API_URL", "http://localhost:18880")
 
 # Telegram Bot Token (replace with your actual token)
 TELEGRAM_BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN", "") # TODO: Replace with actual token
 
+# Seconds a rendered /latest message is reused before the backend is asked again
+LATEST_CACHE_TTL = float(os.environ.get("PULSEBOARD_LATEST_CACHE_TTL", "10"))
+
+# Seconds between digests sent to /subscribe'd chats
+DIGEST_INTERVAL = float(os.environ.get("PULSEBOARD_DIGEST_INTERVAL", "300"))
+
+# Signals listed by name in one digest; the rest are only counted
+DIGEST_MAX_ITEMS = 20
+
+# Pause between digest messages so a broadcast stays under Telegram's ~30 messages/second
+DIGEST_SEND_DELAY = 0.05
+
+# Attempts per chat when Telegram keeps answering a digest with RetryAfter
+DIGEST_SEND_ATTEMPTS = 3
+
+# Bot data (the subscribed chats) is kept here across restarts
+PERSISTENCE_FILE = os.environ.get("PULSEBOARD_BOT_PERSISTENCE_FILE", os.path.expanduser("~/.pulseboard/telegram-bot.pickle"))
+
+# Shared keep-alive client to the backend, opened and closed with the application
+http_client = None
+
+# Rendered /latest message and the ETag of the dashboard payload it came from
+latest_cache = {"message": None, "etag": None, "expires": 0.0}
+
+# Digest state: signals collected since the last digest and the feed position. Subscribed
+# chats live in application.bot_data["subscribers"], which is persisted.
+pending_signals = []
+pending_count = 0
+feed_last_event_id = None
+background_tasks = []
+
+
+def format_timestamp(value: str) -> str:
+    return value.split('.')[0].split('+')[0].rstrip('Z').replace('T', ' ')
+
+
+def render_latest(dashboard_data: dict) -> str:
+    """Formats the dashboard payload as a MarkdownV2 message."""
+    md = lambda text: escape_markdown(str(text), version=2)
+    message = "📊 *Latest PulseBoard Data* 📊\n\n"
+
+    if dashboard_data.get("signals"):
+        message += "*Signals:*\n"
+        for s in dashboard_data["signals"]:
+            message += f"\\- \\[{md(format_timestamp(s['timestamp']))}\\] {md(s['type'])} from {md(s['source'])}\n"
+        message += "\n"
+
+    if dashboard_data.get("events"):
+        message += "*Events:*\n"
+        for e in dashboard_data["events"]:
+            message += f"\\- \\[{md(format_timestamp(e['timestamp']))}\\] {md(e['name'])} \\({md(e.get('description') or 'N/A')}\\) from {md(e['source'])}\n"
+        message += "\n"
+
+    if dashboard_data.get("emails"):
+        message += "*Emails:*\n"
+        for em in dashboard_data["emails"]:
+            message += f"\\- \\[{md(format_timestamp(em['timestamp']))}\\] From: {md(em['sender'])}, Subject: {md(em['subject'])}\n"
+        message += "\n"
+
+    if not any([dashboard_data.get("signals"), dashboard_data.get("events"), dashboard_data.get("emails")]):
+        message += md("No data available yet.")
+
+    return message
+
+
+async def get_latest_message() -> str:
+    """
+    Returns the rendered /latest message, re-rendering only when the dashboard changed.
+
+    Within LATEST_CACHE_TTL the cached message is served without a request;
+    after that a conditional GET revalidates it and a 304 keeps the old render.
+    """
+    now = time.monotonic()
+    if latest_cache["message"] is not None and latest_cache["expires"] > now:
+        return latest_cache["message"]
+
+    headers = {"If-None-Match": latest_cache["etag"]} if latest_cache["etag"] else {}
+    response = await http_client.get("/api/dashboard-data", headers=headers)
+    if response.status_code != 304 or latest_cache["message"] is None:
+        response.raise_for_status()
+        latest_cache["message"] = render_latest(response.json())
+        latest_cache["etag"] = response.headers.get("etag")
+    latest_cache["expires"] = now + LATEST_CACHE_TTL
+    return latest_cache["message"]
+
+
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Sends a welcome message when the command /start is issued."""
     await update.message.reply_text("Hi! I'm your PulseBoard Bot. How can I help you today?")
@@ -26,11 +115,10 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
 async def status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Checks the health of the FastAPI backend."""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{FASTAPI_URL}/health")
-            response.raise_for_status()
-            status_data = response.json()
-            await update.message.reply_text(f"Backend Status: {status_data['status']} - Database: {status_data['database']}")
+        response = await http_client.get("/health")
+        response.raise_for_status()
+        status_data = response.json()
+        await update.message.reply_text(f"Backend Status: {status_data['status']} - Database: {status_data['database']}")
     except httpx.HTTPStatusError as e:
         await update.message.reply_text(f"Error checking backend status: {e.response.status_code} - {e.response.text}")
     except httpx.RequestError as e:
@@ -39,36 +127,7 @@ async def status(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
 async def latest(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Retrieves the latest dashboard data (signals, events, emails)."""
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(f"{FASTAPI_URL}/api/dashboard-data")
-            response.raise_for_status()
-            dashboard_data = response.json()
-
-            message = "📊 *Latest PulseBoard Data* 📊\\n\\n"
-
-            if dashboard_data.get("signals"):
-                message += "*Signals:*\\n"
-                for s in dashboard_data["signals"]:
-                    message += f"- \\[{s['timestamp'].split('.')[0].replace('T', ' ')}\\] {s['type']} from {s['source']}\\n"
-                message += "\\n"
-
-            if dashboard_data.get("events"):
-                message += "*Events:*\\n"
-                for e in dashboard_data["events"]:
-                    message += f"- \\[{e['timestamp'].split('.')[0].replace('T', ' ')}\\] {e['name']} \\({e.get('description', 'N/A')}\\) from {e['source']}\\n"
-                message += "\\n"
-
-            if dashboard_data.get("emails"):
-                message += "*Emails:*\\n"
-                for em in dashboard_data["emails"]:
-                    message += f"- \\[{em['timestamp'].split('.')[0].replace('T', ' ')}\\] From: {em['sender']}, Subject: {em['subject']}\\n"
-                message += "\\n"
-            
-            if not any([dashboard_data.get("signals"), dashboard_data.get("events"), dashboard_data.get("emails")]):
-                message += "No data available yet."
-
-            await update.message.reply_markdown_v2(message)
-
+        await update.message.reply_markdown_v2(await get_latest_message())
     except httpx.HTTPStatusError as e:
         await update.message.reply_text(f"Error fetching latest data: {e.response.status_code} - {e.response.text}")
     except httpx.RequestError as e:
@@ -103,10 +162,9 @@ async def add(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     }
 
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(f"{FASTAPI_URL}/api/signals", json=signal_data)
-            response.raise_for_status()
-            await update.message.reply_text(f"Signal added successfully: {response.json()['message']}")
+        response = await http_client.post("/api/signals", json=signal_data)
+        response.raise_for_status()
+        await update.message.reply_text(f"Signal added successfully: {response.json()['message']}")
     except httpx.HTTPStatusError as e:
         await update.message.reply_text(f"Error adding signal: {e.response.status_code} - {e.response.text}")
     except httpx.RequestError as e:
@@ -115,20 +173,156 @@ async def add(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         logger.error(f"Error in add command: {e}")
         await update.message.reply_text(f"An unexpected error occurred: {e}")
 
+
+async def subscribe(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Subscribes this chat to periodic digests of new signals."""
+    context.bot_data.setdefault("subscribers", set()).add(update.effective_chat.id)
+    await context.application.update_persistence()
+    minutes = max(1, round(DIGEST_INTERVAL / 60))
+    await update.message.reply_text(f"Subscribed. New signals will arrive as a digest every {minutes} minute(s). Use /unsubscribe to stop.")
+
+async def unsubscribe(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Stops digests for this chat."""
+    context.bot_data.setdefault("subscribers", set()).discard(update.effective_chat.id)
+    await context.application.update_persistence()
+    await update.message.reply_text("Unsubscribed from signal digests.")
+
+
+def render_digest(signals: list, total: int) -> str:
+    """Formats the signals collected since the last digest as a MarkdownV2 message."""
+    md = lambda text: escape_markdown(str(text), version=2)
+    message = f"🔔 *{total} new signal{'s' if total != 1 else ''}*\n\n"
+    for s in signals:
+        message += f"\\- \\[{md(format_timestamp(s['timestamp']))}\\] {md(s['type'])} from {md(s['source'])}\n"
+    if total > len(signals):
+        message += md(f"...and {total - len(signals)} more.") + "\n"
+    return message
+
+
+async def follow_feed() -> None:
+    """
+    Collects new signals from the backend's /api/feed event stream.
+
+    Reconnects with Last-Event-ID after any error, so signals inserted while
+    disconnected still end up in the next digest.
+    """
+    global pending_count, feed_last_event_id
+    while True:
+        try:
+            headers = {"Last-Event-ID": feed_last_event_id} if feed_last_event_id else {}
+            async with http_client.stream("GET", "/api/feed", headers=headers, timeout=None) as response:
+                response.raise_for_status()
+                event_type = None
+                async for line in response.aiter_lines():
+                    if line.startswith("id: "):
+                        feed_last_event_id = line[4:]
+                    elif line.startswith("event: "):
+                        event_type = line[7:]
+                    elif line.startswith("data: ") and event_type == "signals":
+                        pending_count += 1
+                        if len(pending_signals) < DIGEST_MAX_ITEMS:
+                            pending_signals.append(json.loads(line[6:]))
+                    elif line.startswith("data: ") and event_type == "reset":
+                        # The backend skipped rows it would not replay; they are missing from the digest
+                        logger.warning(f"Live feed was too far behind and skipped ahead: {line[6:]}")
+                    elif not line:
+                        event_type = None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Live feed connection lost, retrying: {e}")
+        await asyncio.sleep(5)
+
+
+async def send_digest(bot: Bot, chat_id: int, message: str) -> bool:
+    """Sends one digest, waiting out Telegram's flood control; returns False if the chat is gone."""
+    for attempt in range(1, DIGEST_SEND_ATTEMPTS + 1):
+        try:
+            await bot.send_message(chat_id=chat_id, text=message, parse_mode="MarkdownV2")
+            return True
+        except RetryAfter as e:
+            retry_after = e.retry_after
+            if isinstance(retry_after, datetime.timedelta):
+                retry_after = retry_after.total_seconds()
+            logger.info(f"Rate limited sending digest to chat {chat_id}, retrying in {retry_after}s.")
+            await asyncio.sleep(retry_after)
+        except Forbidden as e:
+            logger.info(f"Chat {chat_id} blocked the bot, unsubscribing it: {e}")
+            return False
+        except TelegramError as e:
+            logger.warning(f"Could not send digest to chat {chat_id}: {e}")
+            return True
+    logger.warning(f"Gave up sending digest to chat {chat_id} after {DIGEST_SEND_ATTEMPTS} attempts.")
+    return True
+
+
+async def send_digests(application: Application) -> None:
+    """Every DIGEST_INTERVAL, sends one digest of the collected signals to each subscribed chat."""
+    global pending_count
+    subscribers = application.bot_data.setdefault("subscribers", set())
+    while True:
+        await asyncio.sleep(DIGEST_INTERVAL)
+        if not pending_count:
+            continue
+        if not subscribers:
+            # Nobody is listening: start the next digest from scratch
+            pending_signals.clear()
+            pending_count = 0
+            continue
+        message = render_digest(list(pending_signals), pending_count)
+        pending_signals.clear()
+        pending_count = 0
+        for chat_id in list(subscribers):
+            if not await send_digest(application.bot, chat_id, message):
+                subscribers.discard(chat_id)
+            await asyncio.sleep(DIGEST_SEND_DELAY)
+
+
+async def post_init(application: Application) -> None:
+    """Opens the shared backend client and starts the digest tasks."""
+    global http_client
+    http_client = httpx.AsyncClient(
+        base_url=FASTAPI_URL,
+        timeout=10,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+    )
+    background_tasks.append(asyncio.create_task(follow_feed()))
+    background_tasks.append(asyncio.create_task(send_digests(application)))
+    logger.info(f"{len(application.bot_data.get('subscribers', ()))} chat(s) subscribed to digests.")
+
+async def post_shutdown(application: Application) -> None:
+    """Stops the digest tasks and closes the shared backend client."""
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+    if http_client:
+        await http_client.aclose()
+
 def main() -> None:
     """Starts the bot."""
-    if TELEGRAM_BOT_TOKEN == "YOUR_TELEGRAM_BOT_TOKEN":
+    if not TELEGRAM_BOT_TOKEN or TELEGRAM_BOT_TOKEN == "YOUR_TELEGRAM_BOT_TOKEN":
         logger.error("TELEGRAM_BOT_TOKEN is not set. Please set the environment variable or replace the placeholder.")
         print("TELEGRAM_BOT_TOKEN is not set. Please set the environment variable or replace the placeholder.")
         return
 
-    application = Application.builder().token(TELEGRAM_BOT_TOKEN).build()
+    os.makedirs(os.path.dirname(os.path.abspath(PERSISTENCE_FILE)), exist_ok=True)
+    application = (
+        Application.builder()
+        .token(TELEGRAM_BOT_TOKEN)
+        .persistence(PicklePersistence(filepath=PERSISTENCE_FILE))
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
 
     # On different commands - answer in Telegram
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("status", status))
     application.add_handler(CommandHandler("latest", latest))
     application.add_handler(CommandHandler("add", add))
+    application.add_handler(CommandHandler("subscribe", subscribe))
+    application.add_handler(CommandHandler("unsubscribe", unsubscribe))
 
     # Run the bot until the user presses Ctrl-C
     application.run_polling(allowed_updates=Update.ALL_TYPES)
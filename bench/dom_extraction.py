@@ -0,0 +1,89 @@
+"""
+Compares per-element and single-evaluate DOM extraction on the local Gmail fixture.
+
+Serves bench/fixtures over a throwaway HTTP server and drives headless Chromium:
+
+    python bench/dom_extraction.py --rows 50 200 500 --repeat 5
+"""
+import argparse
+import asyncio
+import functools
+import http.server
+import os
+import statistics
+import sys
+import threading
+import time
+
+from playwright.async_api import async_playwright
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from browser_automation import GMAIL_EXTRACT_JS  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+
+
+async def extract_per_element(page):
+    """The previous approach: several Playwright round trips for every row."""
+    emails = []
+    for element in await page.query_selector_all("tr.zA"):
+        sender_element = await element.query_selector(".yP, .zF")
+        subject_element = await element.query_selector(".y6, .aHS-b-n")
+        sender = await sender_element.inner_text() if sender_element else "Unknown Sender"
+        subject = await subject_element.inner_text() if subject_element else "No Subject"
+        is_read = await element.get_attribute("class") is not None and "zE" not in (await element.get_attribute("class")).split()
+        emails.append({"sender": sender.strip(), "subject": subject.strip(), "is_read": is_read})
+    return emails
+
+
+async def extract_bulk(page):
+    """The current approach: one evaluate call returning every row."""
+    return await page.eval_on_selector_all("tr.zA", GMAIL_EXTRACT_JS)
+
+
+def serve_fixtures():
+    """Starts a static file server for the fixtures on a free port."""
+    handler = functools.partial(http.server.SimpleHTTPRequestHandler, directory=FIXTURES_DIR)
+    handler.log_message = lambda *args: None
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def time_extraction(page, extract, repeat):
+    timings = []
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = len(await extract(page))
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), count
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[50, 200, 500])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    server = serve_fixtures()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        async with async_playwright() as p:
+            browser = await p.chromium.launch(headless=True)
+            page = await browser.new_page()
+            print(f"{'rows':>6} {'per-element ms':>15} {'bulk ms':>9} {'speedup':>8}")
+            for rows in args.rows:
+                await page.goto(f"{base_url}/gmail.html?rows={rows}")
+                await page.wait_for_selector("tr.zA")
+                legacy, legacy_count = await time_extraction(page, extract_per_element, args.repeat)
+                bulk, bulk_count = await time_extraction(page, extract_bulk, args.repeat)
+                assert legacy_count == bulk_count == rows, (legacy_count, bulk_count, rows)
+                print(f"{rows:>6} {legacy * 1000:>15.1f} {bulk * 1000:>9.1f} {legacy / bulk:>7.1f}x")
+            await browser.close()
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,90 @@
+"""
+Compares signal ingest throughput of the single-row and batch endpoints.
+
+Run against a server backed by a throwaway database, e.g.:
+
+    python bench/ingest_throughput.py --url http://localhost:18880 --count 5000
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import time
+
+import httpx
+
+
+def make_signals(count):
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return [
+        {
+            "timestamp": (now - datetime.timedelta(seconds=i)).isoformat(),
+            "type": "bench",
+            "source": "ingest_throughput",
+            "data": {"seq": i, "url": f"https://example.com/{i}"},
+        }
+        for i in range(count)
+    ]
+
+
+async def run_single(client, url, signals, concurrency):
+    """POSTs every signal individually with `concurrency` requests in flight."""
+    queue = asyncio.Queue()
+    for signal in signals:
+        queue.put_nowait(signal)
+
+    async def worker():
+        while not queue.empty():
+            signal = queue.get_nowait()
+            response = await client.post(f"{url}/api/signals", json=signal)
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return time.perf_counter() - start
+
+
+async def run_batch(client, url, signals, batch_size, ndjson):
+    """POSTs the signals in chunks of `batch_size` to the batch endpoint."""
+    start = time.perf_counter()
+    for offset in range(0, len(signals), batch_size):
+        chunk = signals[offset:offset + batch_size]
+        if ndjson:
+            body = "\n".join(json.dumps(signal) for signal in chunk).encode("utf-8")
+            response = await client.post(
+                f"{url}/api/signals/batch",
+                content=body,
+                headers={"Content-Type": "application/x-ndjson"},
+            )
+        else:
+            response = await client.post(f"{url}/api/signals/batch", json=chunk)
+        response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:18880")
+    parser.add_argument("--count", type=int, default=5000, help="signals per run")
+    parser.add_argument("--concurrency", type=int, default=16, help="in-flight requests for the single-row path")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    signals = make_signals(args.count)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        results = {
+            "single": await run_single(client, args.url, signals, args.concurrency),
+            "batch (json)": await run_batch(client, args.url, signals, args.batch_size, ndjson=False),
+            "batch (ndjson)": await run_batch(client, args.url, signals, args.batch_size, ndjson=True),
+        }
+
+    baseline = args.count / results["single"]
+    print(f"{'path':<16} {'seconds':>9} {'signals/s':>12} {'speedup':>8}")
+    for name, elapsed in results.items():
+        rate = args.count / elapsed
+        print(f"{name:<16} {elapsed:>9.3f} {rate:>12.0f} {rate / baseline:>7.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,301 @@
+"""
+Load-tests the API against a throwaway Postgres database and compares runs with a JSON baseline.
+
+Creates a fresh database through --admin-url, starts the server on it,
+seeds it, then drives each scenario with --concurrency requests in flight
+for --duration seconds. The database is dropped afterwards unless --keep-db.
+
+    python bench/load_test.py --admin-url postgresql://localhost/postgres --rows 100000 \\
+        --save-baseline bench/baselines/local.json
+    python bench/load_test.py --admin-url postgresql://localhost/postgres --rows 100000 \\
+        --compare bench/baselines/local.json
+
+A comparison fails (exit status 1) when any scenario loses more than
+--tolerance of its throughput or its p95/p99 latency grows by more than that.
+A baseline recorded with different --rows, --concurrency, --duration or
+--workers is refused (exit status 2) unless --ignore-meta is given.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import urllib.parse
+
+import asyncpg
+import httpx
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend")
+
+# Events and emails are seeded at this fraction of --rows
+SECONDARY_TABLE_RATIO = 0.1
+
+# Rows inserted per seeding statement
+SEED_CHUNK = 500000
+
+SEED_SQL = {
+    "pulseboard_signals": """
+        INSERT INTO pulseboard_signals (timestamp, type, source, data)
+        SELECT now() - g * interval '1 second',
+               (ARRAY['page_visit', 'note', 'alert'])[g % 3 + 1],
+               'source' || (g % 50),
+               jsonb_build_object('url', 'https://example.com/' || g, 'title', 'Page ' || g,
+                                  'captured_via', (ARRAY['extension', 'bot', 'api'])[g % 3 + 1])
+        FROM generate_series($1::int, $2::int) g
+    """,
+    "pulseboard_events": """
+        INSERT INTO pulseboard_events (timestamp, name, description, source, data)
+        SELECT now() - g * interval '1 minute', 'Meeting ' || g, 'Agenda item ' || (g % 1000),
+               'calendar', '{}'::jsonb
+        FROM generate_series($1::int, $2::int) g
+    """,
+    "pulseboard_emails": """
+        INSERT INTO pulseboard_emails (timestamp, sender, subject, body_snippet, is_read, data)
+        SELECT now() - g * interval '1 minute', 'sender' || (g % 500) || '@example.com',
+               'Subject ' || g, 'Snippet about project ' || (g % 1000), g % 2 = 0, '{}'::jsonb
+        FROM generate_series($1::int, $2::int) g
+    """,
+}
+
+
+def make_signal(seq: int) -> dict:
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "type": "load_test",
+        "source": "load_test",
+        "data": {"seq": seq, "url": f"https://example.com/{seq}"},
+    }
+
+
+# Scenario name -> function building (method, path, json body) for the n-th request
+SCENARIOS = {
+    "health": lambda n: ("GET", "/health", None),
+    "post_signal": lambda n: ("POST", "/api/signals", make_signal(n)),
+    "list_signals": lambda n: ("GET", "/api/signals?limit=100", None),
+    "list_signals_by_type": lambda n: ("GET", "/api/signals?type=note&limit=100", None),
+    "list_events": lambda n: ("GET", "/api/events?limit=100", None),
+    "list_emails": lambda n: ("GET", "/api/emails?limit=100", None),
+    "dashboard_data": lambda n: ("GET", "/api/dashboard-data", None),
+}
+
+
+def database_url(admin_url: str, name: str) -> str:
+    """Returns admin_url pointing at database `name`, keeping host and query options."""
+    parts = urllib.parse.urlsplit(admin_url)
+    return urllib.parse.urlunsplit(parts._replace(path=f"/{name}"))
+
+
+async def seed(url: str, rows: int):
+    """Fills the tables server-side with generate_series, SEED_CHUNK rows per statement."""
+    sizes = {
+        "pulseboard_signals": rows,
+        "pulseboard_events": int(rows * SECONDARY_TABLE_RATIO),
+        "pulseboard_emails": int(rows * SECONDARY_TABLE_RATIO),
+    }
+    conn = await asyncpg.connect(url)
+    try:
+        for table, count in sizes.items():
+            start = time.perf_counter()
+            for low in range(1, count + 1, SEED_CHUNK):
+                await conn.execute(SEED_SQL[table], low, min(low + SEED_CHUNK - 1, count))
+            print(f"Seeded {count} rows into {table} in {time.perf_counter() - start:.1f}s.")
+        await conn.execute("ANALYZE")
+    finally:
+        await conn.close()
+
+
+def start_server(url: str, port: int, workers: int) -> subprocess.Popen:
+    """Starts the backend on `url` with uvicorn; extra PULSEBOARD_* settings come from the environment."""
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env={**os.environ, "DATABASE_URL": url},
+    )
+
+
+async def wait_for_server(client: httpx.AsyncClient, server: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with status {server.returncode}.")
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not become healthy in time.")
+
+
+async def run_scenario(client: httpx.AsyncClient, build, concurrency: int, duration: float, warmup: int) -> dict:
+    """Keeps `concurrency` requests in flight for `duration` seconds and summarises their latencies."""
+    counter = iter(range(sys.maxsize))
+
+    async def send():
+        method, path, body = build(next(counter))
+        start = time.perf_counter()
+        response = await client.request(method, path, json=body)
+        return time.perf_counter() - start, response.status_code < 400
+
+    for _ in range(warmup):
+        try:
+            await send()
+        except httpx.TransportError:
+            pass
+
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            try:
+                latency, ok = await send()
+            except httpx.TransportError:
+                errors += 1
+                continue
+            latencies.append(latency)
+            errors += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else [latencies[0] if latencies else 0.0] * 99
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": cuts[49] * 1000,
+        "p95_ms": cuts[94] * 1000,
+        "p99_ms": cuts[98] * 1000,
+    }
+
+
+# Run settings that must match the baseline's for a comparison to mean anything
+COMPARED_META = ("rows", "concurrency", "duration", "workers")
+
+
+def meta_mismatches(meta: dict, baseline: dict) -> list:
+    """Returns one message per COMPARED_META setting that differs from the baseline run."""
+    base = baseline.get("meta", {})
+    return [
+        f"{key}: {meta[key]} vs baseline {base.get(key)}"
+        for key in COMPARED_META
+        if meta[key] != base.get(key)
+    ]
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Returns one message per metric that regressed beyond `tolerance` against the baseline."""
+    regressions = []
+    for name, base in baseline["results"].items():
+        current = results.get(name)
+        if current is None:
+            continue
+        if current["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {current['rps']:.0f}/s vs baseline {base['rps']:.0f}/s")
+        for metric in ("p95_ms", "p99_ms"):
+            if current[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {current[metric]:.1f} vs baseline {base[metric]:.1f}")
+        if current["errors"] > base["errors"]:
+            regressions.append(f"{name}: {current['errors']} errors vs baseline {base['errors']}")
+    return regressions
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--admin-url", default=os.environ.get("PULSEBOARD_BENCH_ADMIN_URL", "postgresql://localhost/postgres"),
+                        help="connection allowed to CREATE DATABASE; the bench database lives next to it")
+    parser.add_argument("--rows", type=int, default=10000, help="signals seeded (events and emails get a tenth)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10, help="seconds per scenario")
+    parser.add_argument("--warmup", type=int, default=50, help="unrecorded requests before each scenario")
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--port", type=int, default=18890)
+    parser.add_argument("--output", help="write the results JSON here")
+    parser.add_argument("--save-baseline", help="write the results JSON here as the new baseline")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed relative regression")
+    parser.add_argument("--ignore-meta", action="store_true",
+                        help="compare even if the baseline was recorded with different settings")
+    parser.add_argument("--keep-db", action="store_true", help="do not drop the bench database afterwards")
+    args = parser.parse_args()
+
+    meta = {
+        "rows": args.rows,
+        "concurrency": args.concurrency,
+        "duration": args.duration,
+        "workers": args.workers,
+    }
+    baseline = None
+    if args.compare:
+        # Checked before the run so a mismatched baseline does not cost a full load test
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        mismatches = meta_mismatches(meta, baseline)
+        for message in mismatches:
+            print(f"{'WARNING' if args.ignore_meta else 'ERROR'} settings differ from {args.compare}: {message}")
+        if mismatches and not args.ignore_meta:
+            sys.exit(2)
+
+    name = f"pulseboard_bench_{os.getpid()}"
+    url = database_url(args.admin_url, name)
+    admin = await asyncpg.connect(args.admin_url)
+    await admin.execute(f"CREATE DATABASE {name}")
+    print(f"Created database {name}.")
+
+    server = start_server(url, args.port, args.workers)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {}
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=30) as client:
+            await wait_for_server(client, server)
+            await seed(url, args.rows)
+            print(f"{'scenario':<22} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+            for scenario in args.scenarios:
+                result = await run_scenario(client, SCENARIOS[scenario], args.concurrency, args.duration, args.warmup)
+                results[scenario] = result
+                print(f"{scenario:<22} {result['requests']:>9} {result['errors']:>7} {result['rps']:>9.0f} "
+                      f"{result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f}")
+    finally:
+        server.terminate()
+        server.wait()
+        if not args.keep_db:
+            await admin.execute(f"DROP DATABASE IF EXISTS {name}")
+        await admin.close()
+
+    report = {
+        "meta": {
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            **meta,
+            "python": platform.python_version(),
+            "machine": platform.node(),
+        },
+        "results": results,
+    }
+    for path in filter(None, (args.output, args.save_baseline)):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {path}.")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
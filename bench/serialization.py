@@ -0,0 +1,83 @@
+"""
+Measures serialization CPU per 10k rows for the read endpoints.
+
+Compares the previous path (a Pydantic model per record, then FastAPI's
+response_model validation and encoding) with encoding the records directly
+through orjson and msgpack. Rows are real asyncpg Records produced by a
+generate_series query, so no tables are touched:
+
+    DATABASE_URL=postgresql://... python bench/serialization.py --rows 10000 --repeat 10
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from typing import List
+
+import asyncpg
+from pydantic import TypeAdapter
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "backend"))
+from server import DATABASE_URL, Signal, init_connection, records_response  # noqa: E402
+
+ROWS_QUERY = """
+    SELECT now() - g * interval '1 second' AS timestamp,
+           'page_visit' AS type,
+           'extension' AS source,
+           jsonb_build_object('url', 'https://example.com/' || g, 'title', 'Page ' || g, 'captured_via', 'extension') AS data
+    FROM generate_series(1, $1) g
+"""
+
+SIGNALS_ADAPTER = TypeAdapter(List[Signal])
+
+
+def previous_path(rows):
+    """Signal(**row) per record, then validate and dump as FastAPI does for response_model=List[Signal]."""
+    models = [Signal(**row) for row in rows]
+    return SIGNALS_ADAPTER.dump_json(SIGNALS_ADAPTER.validate_python(models))
+
+
+def orjson_path(rows):
+    return records_response(rows).body
+
+
+def msgpack_path(rows):
+    return records_response(rows, accept="application/msgpack").body
+
+
+def cpu_time(encode, rows, repeat):
+    timings = []
+    size = 0
+    for _ in range(repeat):
+        start = time.process_time()
+        size = len(encode(rows))
+        timings.append(time.process_time() - start)
+    return statistics.median(timings), size
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    conn = await asyncpg.connect(DATABASE_URL)
+    try:
+        await init_connection(conn)
+        rows = await conn.fetch(ROWS_QUERY, args.rows)
+    finally:
+        await conn.close()
+
+    paths = {"pydantic + response_model": previous_path, "orjson": orjson_path, "msgpack": msgpack_path}
+    results = {name: cpu_time(encode, rows, args.repeat) for name, encode in paths.items()}
+    baseline = results["pydantic + response_model"][0]
+    per = 10000 / args.rows
+    print(f"{'path':<26} {'CPU ms/10k rows':>16} {'bytes':>10} {'speedup':>8}")
+    for name, (seconds, size) in results.items():
+        print(f"{name:<26} {seconds * 1000 * per:>16.1f} {size:>10} {baseline / seconds:>7.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,6 +1,9 @@
 document.addEventListener('DOMContentLoaded', () => {
     const API_URL = 'http://localhost:18880/api/dashboard-data';
-    const FETCH_INTERVAL = 30000; // 30 seconds
+    const FEED_URL = 'http://localhost:18880/api/feed';
+    const FETCH_INTERVAL = 30000; // 30 seconds, only used when live updates are unavailable
+    const STATS_INTERVAL = 60000; // counters the live feed does not update are refreshed this often
+    const MAX_LIVE_ITEMS = 10;
 
     // Elements to update
     const statSignals = document.getElementById('stat-signals');
@@ -51,12 +54,28 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    function updateStats(stats) {
+        statSignals.textContent = stats.totalSignals.toLocaleString();
+        statActions.textContent = stats.pendingActions.toLocaleString();
+        statEvents.textContent = stats.upcomingEvents.toLocaleString();
+        statEmails.textContent = stats.emailsProcessed.toLocaleString();
+    }
+
+    async function refreshStats() {
+        // Only the stats bar: re-rendering the lists would drop the live items
+        try {
+            const response = await fetch(API_URL);
+            if (response.ok) {
+                updateStats((await response.json()).stats);
+            }
+        } catch (error) {
+            console.warn('Error refreshing stats:', error);
+        }
+    }
+
     function updateDashboard(data) {
         // Update Stats Bar
-        statSignals.textContent = data.stats.totalSignals.toLocaleString();
-        statActions.textContent = data.stats.pendingActions.toLocaleString();
-        statEvents.textContent = data.stats.upcomingEvents.toLocaleString();
-        statEmails.textContent = data.stats.emailsProcessed.toLocaleString();
+        updateStats(data.stats);
 
         // Update Signal Feed
         signalFeedContent.innerHTML = ''; // Clear previous content
@@ -120,9 +139,91 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
 
+    function prependLiveItem(container, icon, title, lines) {
+        // Drop the "no data" / loading placeholder on the first live item
+        container.querySelectorAll('.loading-message').forEach(el => el.remove());
+
+        const item = document.createElement('div');
+        item.className = 'signal-feed-item';
+        const iconEl = document.createElement('div');
+        iconEl.className = 'signal-icon';
+        iconEl.textContent = icon;
+        const content = document.createElement('div');
+        content.className = 'signal-content';
+        const heading = document.createElement('h4');
+        heading.textContent = title;
+        content.appendChild(heading);
+        lines.forEach(line => {
+            const p = document.createElement('p');
+            p.textContent = line;
+            content.appendChild(p);
+        });
+        item.appendChild(iconEl);
+        item.appendChild(content);
+        container.prepend(item);
+
+        while (container.children.length > MAX_LIVE_ITEMS) {
+            container.lastElementChild.remove();
+        }
+    }
+
+    let pollTimer = null;
+
+    function startPolling() {
+        if (pollTimer === null) {
+            pollTimer = setInterval(fetchDashboardData, FETCH_INTERVAL);
+        }
+    }
+
+    function stopPolling() {
+        if (pollTimer !== null) {
+            clearInterval(pollTimer);
+            pollTimer = null;
+        }
+    }
+
+    function subscribeToFeed() {
+        // EventSource reconnects on its own and sends Last-Event-ID, so the
+        // server replays anything inserted while we were disconnected.
+        const feed = new EventSource(FEED_URL);
+        feed.onopen = () => stopPolling();
+        feed.addEventListener('signals', (e) => {
+            const signal = JSON.parse(e.data);
+            prependLiveItem(signalFeedContent, '💬', signal.type, [`From ${signal.source}`, new Date(signal.timestamp).toLocaleString()]);
+            statSignals.textContent = (Number(statSignals.textContent.replace(/\D/g, '')) + 1).toLocaleString();
+        });
+        feed.addEventListener('events', (e) => {
+            const event = JSON.parse(e.data);
+            prependLiveItem(calendarContent, '🗓️', event.name, [event.description || '', new Date(event.timestamp).toLocaleString()]);
+        });
+        feed.addEventListener('emails', (e) => {
+            const email = JSON.parse(e.data);
+            prependLiveItem(emailDigestContent, '📧', email.subject, [`From: ${email.sender}`, email.body_snippet || '']);
+        });
+        // Sent when we were too far behind for the server to replay everything
+        feed.addEventListener('reset', () => fetchDashboardData());
+        feed.onerror = () => {
+            if (feed.readyState !== EventSource.CLOSED) {
+                console.warn('Live feed disconnected, retrying...');
+                return;
+            }
+            // An error response (e.g. 503 while the server's listener reconnects) ends
+            // the EventSource for good: poll meanwhile and open a new one later
+            console.warn('Live feed unavailable, polling instead.');
+            fetchDashboardData();
+            startPolling();
+            setTimeout(subscribeToFeed, FETCH_INTERVAL);
+        };
+    }
+
     // Initial fetch
     fetchDashboardData();
 
-    // Set up polling
-    setInterval(fetchDashboardData, FETCH_INTERVAL);
+    // Push updates when the browser supports them, polling otherwise
+    if (window.EventSource) {
+        subscribeToFeed();
+        setInterval(refreshStats, STATS_INTERVAL);
+    } else {
+        startPolling();
+    }
 });